@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Per-turn prompt size: full debate history vs. windowed history with a running summary.
+Run: python benchmarks/bench_debate_history.py [turns] [window] [budget_tokens]
+
+Reports bytes and estimated tokens sent per turn, and in total: the modelled
+cost of each strategy, not a latency measurement (that needs a real client).
+"build us" is the measured local cost of rendering the history.
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from prompts import get_turn_prompt
+from debate_history import DebateHistory, estimate_tokens
+
+WORDS = "bro your rizz is immaculate fr no cap she replied fast that means something lowkey delulu touch grass".split()
+
+
+def make_line(turn: int) -> str:
+    """A synthetic debate line of up to 18 words."""
+    speaker = "Optimist" if turn % 2 == 0 else "Pessimist"
+    return f"{speaker}: " + " ".join(random.choice(WORDS) for _ in range(random.randint(10, 18)))
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    budget = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    random.seed(0)
+
+    lines = []
+    history = DebateHistory(window=window, budget_tokens=budget)
+    full_sent = windowed_sent = 0
+
+    print(f"{'turn':>4} | {'full bytes':>10} {'~tokens':>7} {'build us':>8} | {'windowed bytes':>14} {'~tokens':>7} {'build us':>8}")
+    for turn in range(turns):
+        started = time.perf_counter()
+        full_prompt = get_turn_prompt("optimist", turn, "\n".join(lines) if lines else "No debate yet.")
+        full_us = (time.perf_counter() - started) * 1e6
+
+        started = time.perf_counter()
+        windowed_prompt = get_turn_prompt("optimist", turn, history.render())
+        windowed_us = (time.perf_counter() - started) * 1e6
+
+        full_tokens = estimate_tokens(full_prompt)
+        windowed_tokens = estimate_tokens(windowed_prompt)
+        full_sent += full_tokens
+        windowed_sent += windowed_tokens
+        if turn % 5 == 0 or turn == turns - 1:
+            print(
+                f"{turn:>4} | {len(full_prompt.encode()):>10} {full_tokens:>7} {full_us:>8.1f} | "
+                f"{len(windowed_prompt.encode()):>14} {windowed_tokens:>7} {windowed_us:>8.1f}"
+            )
+
+        line = make_line(turn)
+        lines.append(line)
+        history.add(line)
+
+    print(f"~Tokens sent over {turns} turns: full {full_sent}, windowed {windowed_sent}")
+
+
+if __name__ == "__main__":
+    main()
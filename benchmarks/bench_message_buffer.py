@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: legacy deque-of-dicts message buffers vs. slotted ring buffers.
+Run: python benchmarks/bench_message_buffer.py [channels] [buffer_size]
+"""
+
+import os
+import sys
+import gc
+import random
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from message_buffer import MessageRecord, ChannelBuffer
+
+
+AUTHORS = [(random.randrange(10**17, 10**18), f"user{i}") for i in range(40)]
+WORDS = "no way fr that is actually so real lowkey we should get food later ok".split()
+
+
+def make_message(index: int):
+    """Generate one synthetic message as raw fields."""
+    author_id, author_name = random.choice(AUTHORS)
+    content = " ".join(random.choice(WORDS) for _ in range(random.randint(3, 15)))
+    created_at = datetime.fromtimestamp(1_700_000_000 + index, tz=timezone.utc)
+    message_id = 1_100_000_000_000_000_000 + index
+    return message_id, author_id, author_name, content, created_at
+
+
+def build_legacy(channels: int, buffer_size: int, messages):
+    """Old layout: guild -> channel -> deque of 4-key dicts with string IDs."""
+    buffers = {}
+    for channel in range(channels):
+        guild = buffers.setdefault(str(channel // 10), {})
+        buf = guild[str(channel)] = deque(maxlen=buffer_size)
+        for message_id, author_id, author_name, content, created_at in messages[channel]:
+            buf.append({
+                'content': content,
+                'author_name': author_name,
+                'author_id': str(author_id),
+                'timestamp': created_at.isoformat()
+            })
+    return buffers
+
+
+def build_compact(channels: int, buffer_size: int, messages):
+    """New layout: guild -> channel -> preallocated ring buffer of slotted records."""
+    buffers = {}
+    for channel in range(channels):
+        guild = buffers.setdefault(str(channel // 10), {})
+        buf = guild[str(channel)] = ChannelBuffer(buffer_size)
+        for message_id, author_id, author_name, content, created_at in messages[channel]:
+            buf.append(MessageRecord(
+                message_id=message_id,
+                author_id=author_id,
+                timestamp_ms=int(created_at.timestamp() * 1000),
+                author_name=author_name,
+                content=content
+            ))
+    return buffers
+
+
+def measure(builder, channels: int, buffer_size: int, messages) -> int:
+    """Return bytes retained by the structure `builder` produces."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    buffers = builder(channels, buffer_size, messages)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del buffers
+    return after - before
+
+
+def main():
+    channels = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    buffer_size = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    random.seed(0)
+
+    # Content strings are shared by both layouts, so only the container overhead differs;
+    # send 2x buffer_size messages per channel so the ring buffers wrap.
+    messages = [
+        [make_message(channel * 1000 + i) for i in range(buffer_size * 2)]
+        for channel in range(channels)
+    ]
+    total = channels * buffer_size
+
+    legacy = measure(build_legacy, channels, buffer_size, messages)
+    compact = measure(build_compact, channels, buffer_size, messages)
+
+    print(f"Channels: {channels}, buffer size: {buffer_size}, retained messages: {total}")
+    print(f"Legacy deque of dicts:  {legacy / 1024 / 1024:8.2f} MiB  ({legacy / total:6.1f} B/message)")
+    print(f"Slotted ring buffer:    {compact / 1024 / 1024:8.2f} MiB  ({compact / total:6.1f} B/message)")
+    print(f"Reduction:              {100 * (1 - compact / legacy):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
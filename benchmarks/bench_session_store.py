@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Hot-path latency benchmark: plain dicts (the pre-store baseline) vs. the default
+Session (no-op store) vs. Session backed by the SQLite store.
+Run: python benchmarks/bench_session_store.py [guilds]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from session import ChannelSetup, Session, UserSession
+from session_store import SQLiteSessionStore
+
+
+def setup_guild(session: Session, guild: int) -> None:
+    """/setup for a single guild."""
+    session.set_channel_setup(
+        guild_id=str(guild),
+        player1_id=str(guild * 2),
+        player2_id=str(guild * 2 + 1),
+        general_channel_id=str(10**6 + guild),
+        player1_room_id=str(2 * 10**6 + guild),
+        player2_room_id=str(3 * 10**6 + guild)
+    )
+    for user in (guild * 2, guild * 2 + 1):
+        session.set_user_session(str(user), "opt-assistant", "pes-assistant")
+
+
+def setup_guild_dicts(users: dict, channels: dict, guild: int) -> None:
+    """/setup for a single guild as it was before the store: plain dict assignments."""
+    channels[str(guild)] = ChannelSetup(
+        player1_id=str(guild * 2),
+        player2_id=str(guild * 2 + 1),
+        general_channel_id=str(10**6 + guild),
+        player1_room_id=str(2 * 10**6 + guild),
+        player2_room_id=str(3 * 10**6 + guild)
+    )
+    for user in (guild * 2, guild * 2 + 1):
+        users[str(user)] = UserSession(
+            optimist_assistant_id="opt-assistant",
+            pessimist_assistant_id="pes-assistant"
+        )
+
+
+def time_per_call(label: str, calls: int, func) -> None:
+    """Print mean microseconds per call of func(i) for i in range(calls)."""
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<34} {1e6 * elapsed / calls:8.2f} us/call")
+
+
+async def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = guilds * 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sessions.db')
+
+        print(f"Guilds: {guilds}")
+
+        print("Baseline (plain dicts, no store):")
+        users, channels = {}, {}
+        time_per_call("set_channel_setup + 2 users", guilds, lambda i: setup_guild_dicts(users, channels, i))
+        time_per_call("get_channel_setup (hit)", lookups, lambda i: channels.get(str(i % guilds)))
+
+        print("In-memory Session (no-op store):")
+        memory = Session()
+        time_per_call("set_channel_setup + 2 users", guilds, lambda i: setup_guild(memory, i))
+        time_per_call("get_channel_setup (hit)", lookups, lambda i: memory.get_channel_setup(str(i % guilds)))
+
+        print("SQLite Session (write-behind):")
+        writer = Session(store=SQLiteSessionStore(path, flush_interval=0.05))
+        time_per_call("set_channel_setup + 2 users", guilds, lambda i: setup_guild(writer, i))
+        started = time.perf_counter()
+        await writer.store.flush()
+        print(f"  {'flush of all pending rows':<34} {1000 * (time.perf_counter() - started):8.2f} ms total")
+        print(f"  store stats: {writer.store.get_stats()}")
+        await writer.close()
+
+        print("SQLite Session after restart (lazy load):")
+        reader = Session(store=SQLiteSessionStore(path))
+        time_per_call("get_channel_setup (first access)", guilds, lambda i: reader.get_channel_setup(str(i)))
+        time_per_call("get_channel_setup (hit)", lookups, lambda i: reader.get_channel_setup(str(i % guilds)))
+        time_per_call("get_channel_setup (unknown guild)", lookups, lambda i: reader.get_channel_setup(f"x{i % guilds}"))
+        await reader.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup time and resident memory of the Optimist bot under a BOT_PROFILE.
+Connects with OPTIMIST_TOKEN, waits for on_ready, reports, and disconnects.
+Run once per profile and compare:
+    BOT_PROFILE=default python benchmarks/measure_bot_profile.py
+    BOT_PROFILE=lean python benchmarks/measure_bot_profile.py
+
+Without a token or network, --offline feeds synthetic GUILD_CREATE payloads
+(every member included, as after chunking) through the client's own state
+handling, measuring the member/user cache cost of each profile. The gateway
+round trips of member chunking are not part of that measurement.
+    BOT_PROFILE=lean python benchmarks/measure_bot_profile.py --offline [guilds] [members]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import resource
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import bot_optimist
+
+
+def rss_mib() -> float:
+    """Current resident set size (falls back to peak RSS off Linux)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MeasuredBot(bot_optimist.OptimistBot):
+    """Optimist bot that only connects: no command sync, workers or backfill."""
+
+    async def setup_hook(self):
+        pass
+
+    async def on_ready(self):
+        self.ready_at = time.perf_counter()
+        await self.close()
+
+
+def guild_payload(index: int, members: int) -> dict:
+    """A GUILD_CREATE payload for a large guild with `members` members."""
+    guild_id = 10**17 + index
+    return {
+        'id': str(guild_id), 'name': f"guild {index}", 'owner_id': '1', 'large': True, 'unavailable': False,
+        'member_count': members, 'roles': [], 'emojis': [], 'stickers': [], 'features': [], 'channels': [],
+        'members': [
+            {
+                'user': {
+                    'id': str(2 * 10**17 + index * members + i), 'username': f"user{i}",
+                    'discriminator': '0', 'global_name': f"User {i}", 'avatar': None
+                },
+                'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'nick': None,
+                'deaf': False, 'mute': False, 'flags': 0
+            }
+            for i in range(members)
+        ],
+    }
+
+
+async def measure_offline(guilds: int, members: int) -> None:
+    """Load synthetic guilds into a client that never connects."""
+    payloads = [guild_payload(index, members) for index in range(guilds)]
+    bot = MeasuredBot()
+    before = rss_mib()
+    started = time.perf_counter()
+    for payload in payloads:
+        bot._connection._add_guild_from_data(payload)
+    elapsed = time.perf_counter() - started
+    after = rss_mib()
+    del payloads
+
+    print(f"Profile:          {bot_optimist.BOT_PROFILE} (offline)")
+    print(f"Guilds:           {guilds} x {members} members")
+    print(f"Cached members:   {sum(len(guild.members) for guild in bot.guilds)}")
+    print(f"Cached users:     {len(bot.users)}")
+    print(f"Guild load time:  {elapsed:.2f}s")
+    print(f"RSS for caches:   +{after - before:.1f} MiB")
+
+
+async def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--offline':
+        guilds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        members = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+        await measure_offline(guilds, members)
+        return
+
+    token = os.getenv('OPTIMIST_TOKEN')
+    if not token:
+        raise SystemExit("OPTIMIST_TOKEN not set")
+
+    before = rss_mib()
+    started = time.perf_counter()
+    bot = MeasuredBot()
+    await bot.start(token)
+
+    members = sum(len(guild.members) for guild in bot.guilds)
+    print(f"Profile:          {bot_optimist.BOT_PROFILE}")
+    print(f"Guilds:           {len(bot.guilds)}")
+    print(f"Cached members:   {members}")
+    print(f"Time to ready:    {bot.ready_at - started:.2f}s")
+    print(f"RSS at ready:     {rss_mib():.1f} MiB (+{rss_mib() - before:.1f} MiB for the client)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,37 @@
 import os
+import time
 import asyncio
-from typing import Optional
+from typing import Optional, Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
 import logging
 import json
 from dotenv import load_dotenv
 
+from resilience import RetryPolicy, CircuitBreaker, parse_retry_after
+from response_cache import ResponseCache
+from metrics import metrics
+from tracing import tracer
+
 logger = logging.getLogger(__name__)
 
+request_seconds = metrics.histogram(
+    'backboard_request_seconds',
+    'Backboard API call latency (cache hits excluded)',
+    labels=('operation', 'send_to_llm')
+)
+
 # Ensure .env is loaded even when this module is imported before main.py
 load_dotenv()
 
 
+class BackboardAPIError(RuntimeError):
+    """Non-200 response from the Backboard API."""
+    
+    def __init__(self, status: int, error_text: str):
+        super().__init__(f"Backboard API error {status}: {error_text}")
+        self.status = status
+
+
 class BackboardClient:
     """Client for interacting with Backboard API."""
     
@@ -20,6 +41,14 @@ class BackboardClient:
         self.model = os.getenv('BACKBOARD_MODEL', 'gpt-4o')
         self.model_provider = os.getenv('BACKBOARD_LLM_PROVIDER', 'openai')
         
+        # Connection pool settings
+        self.pool_limit = int(os.getenv('BACKBOARD_POOL_LIMIT', '100'))
+        self.pool_limit_per_host = int(os.getenv('BACKBOARD_POOL_LIMIT_PER_HOST', '16'))
+        self.keepalive_timeout = float(os.getenv('BACKBOARD_KEEPALIVE_TIMEOUT', '60'))
+        self.dns_cache_ttl = int(os.getenv('BACKBOARD_DNS_CACHE_TTL', '300'))
+        self.connect_timeout = float(os.getenv('BACKBOARD_CONNECT_TIMEOUT', '10'))
+        self.read_timeout = float(os.getenv('BACKBOARD_READ_TIMEOUT', '60'))
+        
         if not self.api_key:
             raise ValueError("BACKBOARD_API_KEY not set")
         
@@ -27,39 +56,231 @@ class BackboardClient:
             import aiohttp
             self.aiohttp = aiohttp
             self.session: Optional[aiohttp.ClientSession] = None
+            self.connector: Optional[aiohttp.TCPConnector] = None
         except ImportError:
             raise ImportError("aiohttp package required. Install with: pip install aiohttp")
+        
+        # Every request goes to the Backboard host, so one semaphore caps
+        # concurrency per host and lets us count callers waiting for a slot.
+        self._host_slots = asyncio.Semaphore(self.pool_limit_per_host)
+        self._in_flight = 0
+        self._waiting = 0
+        
+        # Retries for transient failures, with a breaker behind them
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(os.getenv('BACKBOARD_MAX_ATTEMPTS', '3')),
+            base_delay=float(os.getenv('BACKBOARD_RETRY_BASE_DELAY', '0.5')),
+            max_delay=float(os.getenv('BACKBOARD_RETRY_MAX_DELAY', '8'))
+        )
+        self.breaker = CircuitBreaker(
+            "backboard",
+            failure_threshold=float(os.getenv('BACKBOARD_BREAKER_THRESHOLD', '0.5')),
+            min_calls=int(os.getenv('BACKBOARD_BREAKER_MIN_CALLS', '10')),
+            window_seconds=float(os.getenv('BACKBOARD_BREAKER_WINDOW', '30')),
+            open_seconds=float(os.getenv('BACKBOARD_BREAKER_OPEN_SECONDS', '15'))
+        )
+        self.retries = 0
+        # Errors raised before the request reached the server (connect failures and timeouts)
+        self._not_sent_errors = (self.aiohttp.ClientConnectorError,) + (
+            (self.aiohttp.ConnectionTimeoutError,) if hasattr(self.aiohttp, 'ConnectionTimeoutError') else ()
+        )
+        
+        # Optional cache for thread-independent prompts (disabled when size is 0)
+        cache_size = int(os.getenv('BACKBOARD_CACHE_SIZE', '256'))
+        self.cache: Optional[ResponseCache] = (
+            ResponseCache(cache_size, float(os.getenv('BACKBOARD_CACHE_TTL', '600')))
+            if cache_size > 0 else None
+        )
     
     async def _get_session(self) -> 'aiohttp.ClientSession':
-        """Get or create aiohttp session."""
+        """Get or create the pooled aiohttp session."""
         if self.session is None or self.session.closed:
-            self.session = self.aiohttp.ClientSession()
+            self.connector = self.aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+                enable_cleanup_closed=True
+            )
+            self.session = self.aiohttp.ClientSession(
+                connector=self.connector,
+                timeout=self._make_timeout(None)
+            )
         return self.session
     
+    def _make_timeout(self, total: Optional[float]) -> 'aiohttp.ClientTimeout':
+        """Build a timeout with separate connect and read limits."""
+        return self.aiohttp.ClientTimeout(
+            total=total,
+            connect=self.connect_timeout,
+            sock_read=self.read_timeout
+        )
+    
+    @asynccontextmanager
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator['aiohttp.ClientResponse']:
+        """
+        Issue a request through the shared pool, retrying transient failures.
+        
+        Every Backboard request changes a thread, so only attempts the server
+        provably did not process are retried: failures to establish a connection,
+        and retryable statuses (425, 429, 503, or any with Retry-After). Dropped
+        connections, read timeouts and other 5xx are not retried, since the first
+        attempt may already have been applied. Retries use jittered backoff,
+        honouring Retry-After. `timeout` is a deadline for
+        all attempts together, so retries never extend how long a caller waits.
+        The circuit breaker is consulted before each attempt. A host slot is held
+        until the caller has consumed the body.
+        """
+        session = await self._get_session()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        attempt = 0
+        
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise asyncio.TimeoutError()
+            
+            probe = self.breaker.before_call()
+            
+            self._waiting += 1
+            try:
+                await self._host_slots.acquire()
+            except BaseException:
+                self.breaker.record_abandoned(probe)
+                raise
+            finally:
+                self._waiting -= 1
+            
+            self._in_flight += 1
+            response = None
+            try:
+                try:
+                    response = await session.request(method, url, timeout=self._make_timeout(remaining), **kwargs)
+                except (self.aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.breaker.record_failure(probe)
+                    # Only a connection that was never made is safe to retry
+                    if not isinstance(e, self._not_sent_errors):
+                        raise
+                    delay = self._retry_delay(attempt, deadline)
+                    if delay is None:
+                        raise
+                    logger.warning(f"Backboard request failed (attempt {attempt}): {e!r}")
+                else:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if response.status >= 500 or response.status in (408, 429):
+                        self.breaker.record_failure(probe)
+                    else:
+                        self.breaker.record_success(probe)
+                    if self.retry_policy.should_retry_status(response.status, retry_after):
+                        delay = self._retry_delay(attempt, deadline, retry_after)
+                    else:
+                        delay = None
+                    
+                    # Hand the response to the caller unless we are going to retry it
+                    if delay is None:
+                        try:
+                            yield response
+                        finally:
+                            response.release()
+                        return
+                    
+                    logger.warning(f"Backboard returned {response.status} (attempt {attempt})")
+                    response.release()
+            except BaseException:
+                # Cancelled or failed before an outcome was recorded
+                if response is None:
+                    self.breaker.record_abandoned(probe)
+                raise
+            finally:
+                self._in_flight -= 1
+                self._host_slots.release()
+            
+            self.retries += 1
+            await asyncio.sleep(delay)
+    
+    def _retry_delay(
+        self,
+        attempt: int,
+        deadline: Optional[float],
+        retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """Return the backoff before the next attempt, or None if we should stop retrying."""
+        if attempt >= self.retry_policy.max_attempts:
+            return None
+        
+        delay = self.retry_policy.backoff(attempt, retry_after)
+        if delay is None:
+            return None
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+    
+    async def _raise_for_status(self, response: 'aiohttp.ClientResponse') -> None:
+        """Raise BackboardAPIError for any non-200 response."""
+        if response.status != 200:
+            error_text = await response.text()
+            raise BackboardAPIError(response.status, error_text)
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Return retry and circuit breaker counters."""
+        return {'retries': self.retries, **self.breaker.get_stats()}
+    
+    def get_pool_stats(self) -> Dict[str, int]:
+        """
+        Report connection pool usage for sizing.
+        
+        Returns:
+            Dict with 'open', 'idle', 'in_use', 'in_flight', 'waiting', 'limit', 'limit_per_host'
+        """
+        idle = 0
+        in_use = 0
+        if self.connector is not None and not self.connector.closed:
+            # aiohttp has no public accessor for these; read the connector's bookkeeping
+            idle = sum(len(conns) for conns in getattr(self.connector, '_conns', {}).values())
+            in_use = len(getattr(self.connector, '_acquired', ()))
+        
+        return {
+            'open': idle + in_use,
+            'idle': idle,
+            'in_use': in_use,
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'limit': self.pool_limit,
+            'limit_per_host': self.pool_limit_per_host,
+        }
+    
     async def close(self):
-        """Close the client session."""
+        """Close the client session and its connector."""
         if self.session and not self.session.closed:
             await self.session.close()
+        self.connector = None
     
     async def create_thread(self, assistant_id: str) -> str:
         """Create a thread for a given assistant and return thread_id."""
         if not assistant_id:
             raise ValueError("assistant_id is required to create a thread")
         
-        session = await self._get_session()
         url = f"{self.base_url}/assistants/{assistant_id}/threads"
         headers = {"X-API-Key": self.api_key}
         
-        async with session.post(url, headers=headers, json={}) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise RuntimeError(f"Backboard API error {response.status}: {error_text}")
-            
-            data = await response.json()
-            thread_id = data.get("thread_id")
-            if not thread_id:
-                raise RuntimeError(f"Backboard API response missing thread_id: {data}")
-            return thread_id
+        with request_seconds.time(operation='create_thread', send_to_llm=False), \
+                tracer.span('backboard.create_thread', assistant_id=assistant_id):
+            async with self._request("POST", url, headers=headers, json={}) as response:
+                await self._raise_for_status(response)
+                
+                data = await response.json()
+                thread_id = data.get("thread_id")
+                if not thread_id:
+                    raise RuntimeError(f"Backboard API response missing thread_id: {data}")
+                return thread_id
     
     async def send_message(
         self,
@@ -68,16 +289,26 @@ class BackboardClient:
         timeout: float = 60.0,
         memory: str = "Auto",
         send_to_llm: bool = True,
-        web_search: str = "off"
+        web_search: str = "off",
+        cache: bool = False
     ) -> str:
         """
         Send a message and get response using Backboard API.
         Returns response content.
+        
+        Pass cache=True only when the prompt is self-contained (it does not
+        depend on earlier messages in the thread); calls that use thread
+        memory bypass the cache regardless. Debate turns and advice use
+        thread memory, so a normal analysis is never answered from cache.
         """
-        session = await self._get_session()
-
         if not thread_id:
             raise ValueError("thread_id is required")
+        
+        cache_key = self._cache_key(content, memory, web_search, send_to_llm, cache)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         url = f"{self.base_url}/threads/{thread_id}/messages"
         headers = {"X-API-Key": self.api_key}
@@ -92,19 +323,203 @@ class BackboardClient:
         }
 
         try:
-            async with session.post(url, headers=headers, data=form, timeout=timeout) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise RuntimeError(f"Backboard API error {response.status}: {error_text}")
-                
-                data = await response.json()
-                return data.get("content", "")
+            with request_seconds.time(operation='send_message', send_to_llm=send_to_llm), \
+                    tracer.span('backboard.send_message', thread_id=thread_id, send_to_llm=send_to_llm):
+                async with self._request("POST", url, timeout=timeout, headers=headers, data=form) as response:
+                    await self._raise_for_status(response)
+                    
+                    data = await response.json()
+                    content = data.get("content", "")
+                    if cache_key and content:
+                        self.cache.set(cache_key, content)
+                    return content
                 
         except asyncio.TimeoutError:
             raise TimeoutError(f"Request exceeded timeout of {timeout}s")
         except Exception as e:
             logger.error(f"Backboard API request failed: {e}")
             raise
+    
+    async def stream_message(
+        self,
+        thread_id: str,
+        content: str,
+        timeout: float = 60.0,
+        memory: str = "Auto",
+        web_search: str = "off",
+        cache: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Send a message with streaming enabled and yield response text as it arrives.
+        
+        A cached response (see send_message) is yielded as a single chunk.
+        """
+        if not thread_id:
+            raise ValueError("thread_id is required")
+        
+        cache_key = self._cache_key(content, memory, web_search, True, cache)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        started = time.perf_counter()
+        # Steps of this generator may run in different tasks, so the span is recorded
+        # afterwards against the caller's span rather than opened as the current one
+        parent = tracer.current()
+        try:
+            async for chunk in self._stream_events(thread_id, content, timeout, memory, web_search):
+                if not parts:
+                    request_seconds.observe(
+                        time.perf_counter() - started, operation='stream_first_chunk', send_to_llm=True
+                    )
+                parts.append(chunk)
+                yield chunk
+            request_seconds.observe(time.perf_counter() - started, operation='stream_message', send_to_llm=True)
+        finally:
+            if parent is not None:
+                tracer.record('backboard.stream_message', started, parent=parent, thread_id=thread_id, chunks=len(parts))
+        
+        if cache_key and parts:
+            self.cache.set(cache_key, "".join(parts))
+    
+    async def _stream_events(
+        self,
+        thread_id: str,
+        content: str,
+        timeout: float,
+        memory: str,
+        web_search: str
+    ) -> AsyncIterator[str]:
+        """
+        Post a streaming request and yield text deltas.
+        
+        Backboard streams server-sent events; each 'data:' payload carrying
+        content is yielded as one chunk.
+        """
+
+        url = f"{self.base_url}/threads/{thread_id}/messages"
+        headers = {"X-API-Key": self.api_key, "Accept": "text/event-stream"}
+        form = {
+            "content": content,
+            "llm_provider": self.model_provider,
+            "model_name": self.model,
+            "memory": memory,
+            "send_to_llm": "true",
+            "stream": "true",
+            "web_search": web_search,
+        }
+
+        try:
+            async with self._request("POST", url, timeout=timeout, headers=headers, data=form) as response:
+                await self._raise_for_status(response)
+                
+                # Servers that ignore the stream flag answer with plain JSON
+                if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                    data = await response.json()
+                    text = data.get("content", "")
+                    if text:
+                        yield text
+                    return
+                
+                data_lines = []
+                async for raw_line in response.content:
+                    line = raw_line.decode('utf-8').rstrip('\r\n')
+                    
+                    # A blank line terminates one event
+                    if not line:
+                        if data_lines:
+                            payload = "\n".join(data_lines)
+                            data_lines = []
+                            if payload.strip() == "[DONE]":
+                                return
+                            chunk = self._parse_stream_event(payload)
+                            if chunk:
+                                yield chunk
+                        continue
+                    
+                    if line.startswith('data:'):
+                        data_lines.append(line[5:].lstrip(' '))
+                
+                # Flush a trailing event without the closing blank line
+                if data_lines:
+                    payload = "\n".join(data_lines)
+                    if payload.strip() != "[DONE]":
+                        chunk = self._parse_stream_event(payload)
+                        if chunk:
+                            yield chunk
+                
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Request exceeded timeout of {timeout}s")
+        except Exception as e:
+            logger.error(f"Backboard API stream failed: {e}")
+            raise
+    
+    def _cache_key(
+        self,
+        content: str,
+        memory: str,
+        web_search: str,
+        send_to_llm: bool,
+        requested: bool
+    ) -> Optional[str]:
+        """Return the cache key for a call, or None if it must not use the cache."""
+        if not requested or self.cache is None:
+            return None
+        
+        # Only LLM calls that ignore thread memory can be answered from cache
+        if not send_to_llm or memory.lower() != "off":
+            self.cache.bypasses += 1
+            return None
+        
+        return ResponseCache.make_key(content, self.model, self.model_provider, memory, web_search)
+    
+    def get_cached(self, content: str, web_search: str = "off") -> Optional[str]:
+        """
+        Return the cached response to a self-contained (memory="off") prompt, if any.
+        
+        With cache_response, lets a caller check a response before caching it,
+        where send_message(cache=True) would cache whatever comes back.
+        """
+        cache_key = self._cache_key(content, "off", web_search, True, True)
+        return self.cache.get(cache_key) if cache_key else None
+    
+    def cache_response(self, content: str, response: str, web_search: str = "off") -> None:
+        """Cache a response to a self-contained (memory="off") prompt."""
+        cache_key = self._cache_key(content, "off", web_search, True, True)
+        if cache_key and response:
+            self.cache.set(cache_key, response)
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Return response cache hit/miss/eviction counters (empty if disabled)."""
+        return self.cache.get_stats() if self.cache else {}
+    
+    @staticmethod
+    def _parse_stream_event(payload: str) -> Optional[str]:
+        """Extract the text delta from one streamed event payload."""
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            # Bare text payloads are the delta itself
+            return payload
+        
+        if not isinstance(event, dict):
+            return None
+        
+        event_type = event.get("type", "")
+        if event_type == "error":
+            raise RuntimeError(f"Backboard stream error: {event.get('error') or event.get('message') or event}")
+        
+        # Completion events repeat the full text; only deltas are yielded
+        if event_type and not ("stream" in event_type or "delta" in event_type):
+            return None
+        
+        chunk = event.get("content")
+        if chunk is None:
+            chunk = event.get("delta")
+        return chunk if isinstance(chunk, str) else None
 
 
 # Global client instance
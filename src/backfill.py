@@ -0,0 +1,109 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import discord
+
+from session import session
+from orchestrator import Orchestrator, orchestrator
+from message_buffer import MessageRecord
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryBackfill:
+    """
+    Fills message buffers from Discord channel history after startup.
+
+    Each configured guild's general channel is read (last buffer_size
+    messages) with at most `concurrency` guilds in flight. discord.py waits
+    out rate limits itself; a fetch still failing with 429 once its retries
+    run out waits for Retry-After and is tried again.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, concurrency: int = 4, max_attempts: int = 3):
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+        # Metrics from the last run
+        self.channels = 0
+        self.fetched = 0
+        self.merged = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.seconds = 0.0
+
+    async def run(self, client: discord.Client) -> None:
+        """Backfill every tracked general channel the client can see."""
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        channels = []
+        for guild in client.guilds:
+            channel_setup = session.get_channel_setup(str(guild.id))
+            if not channel_setup:
+                continue
+            channel = client.get_channel(int(channel_setup.general_channel_id))
+            if channel is None:
+                logger.warning(f"Backfill: general channel for guild {guild.id} not found")
+                continue
+            channels.append(channel)
+
+        await asyncio.gather(*(self._backfill_channel(channel, slots) for channel in channels))
+
+        self.seconds = time.perf_counter() - started
+        logger.info(
+            f"Backfill loaded {self.merged} new messages ({self.fetched} fetched) "
+            f"from {self.channels} channels in {self.seconds:.2f}s"
+        )
+
+    async def _backfill_channel(self, channel: discord.TextChannel, slots: asyncio.Semaphore) -> None:
+        """Fetch one channel's recent history and merge it into its buffer."""
+        async with slots:
+            records = await self._fetch(channel)
+        if records is None:
+            self.errors += 1
+            return
+
+        self.channels += 1
+        self.fetched += len(records)
+        self.merged += self.orchestrator.merge_history(str(channel.guild.id), str(channel.id), records)
+
+    async def _fetch(self, channel: discord.TextChannel) -> Optional[List[MessageRecord]]:
+        """Read the channel's last buffer_size human messages, or None on failure."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return [
+                    MessageRecord.from_discord(message)
+                    async for message in channel.history(limit=self.orchestrator.buffer_size)
+                    if not message.author.bot
+                ]
+            except discord.HTTPException as e:
+                if e.status == 429 and attempt < self.max_attempts:
+                    self.rate_limited += 1
+                    await asyncio.sleep(float(getattr(e.response, 'headers', {}).get('Retry-After', 1.0)))
+                    continue
+                logger.error(f"Backfill of #{channel.name} failed: {e}")
+                return None
+        logger.error(f"Backfill of #{channel.name} gave up after {self.max_attempts} attempts")
+        return None
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return how long backfill took and how much it loaded."""
+        return {
+            'channels': self.channels,
+            'fetched': self.fetched,
+            'merged': self.merged,
+            'errors': self.errors,
+            'rate_limited': self.rate_limited,
+            'seconds': self.seconds,
+        }
+
+
+# Global backfill instance
+history_backfill = HistoryBackfill(
+    orchestrator,
+    concurrency=int(os.getenv('BACKFILL_CONCURRENCY', '4'))
+)
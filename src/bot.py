@@ -3,6 +3,7 @@ from discord import app_commands
 from discord.ext import commands
 import logging
 import asyncio
+import time
 from typing import List, Optional, Dict
 import os
 from dotenv import load_dotenv
@@ -36,28 +37,82 @@ ANALYSIS_TIMEOUT = 300.0  # 5 minutes total
 TURN_TIMEOUT = 30.0  # 30 seconds per turn
 COOLDOWN_SECONDS = 60.0
 MAX_MESSAGE_LENGTH = 1900  # Discord limit is 2000, leave buffer
+SCAN_CONCURRENCY = int(os.getenv('SCAN_CONCURRENCY', '5'))  # channels fetched at once
 
 
 async def fetch_user_messages(
     guild: discord.Guild, 
     user: discord.Member, 
-    limit: int = 50
+    limit: int = 50,
+    max_messages: int = 50
 ) -> List[str]:
-    """Fetch recent messages from a user across all channels."""
-    messages = []
+    """
+    Fetch recent messages from a user across all channels, newest first.
     
-    for channel in guild.text_channels:
-        try:
-            async for message in channel.history(limit=limit):
-                if message.author.id == user.id:
-                    messages.append(message.content)
-        except discord.Forbidden:
-            continue
-        except Exception as e:
-            logger.error(f"Error fetching messages from {channel.name}: {e}")
-            continue
+    Channels are scanned concurrently (SCAN_CONCURRENCY at a time), most
+    recently active first, and scanning stops once max_messages of the
+    user's messages have been collected.
+    """
+    # Most recently active channels first; skip ones we can't read anyway
+    channels = sorted(
+        (
+            channel for channel in guild.text_channels
+            if channel.permissions_for(guild.me).read_message_history
+        ),
+        key=lambda channel: channel.last_message_id or 0,
+        reverse=True
+    )
+    
+    found: List[discord.Message] = []
+    enough = asyncio.Event()
+    slots = asyncio.Semaphore(SCAN_CONCURRENCY)
+    # channel ID -> scan seconds (names aren't unique across categories)
+    timings: Dict[int, float] = {}
+    
+    async def scan(channel: discord.TextChannel) -> None:
+        async with slots:
+            if enough.is_set():
+                return
+            started = time.perf_counter()
+            try:
+                async for message in channel.history(limit=limit):
+                    if message.author.id == user.id:
+                        found.append(message)
+                        if len(found) >= max_messages:
+                            enough.set()
+                    if enough.is_set():
+                        break
+            except discord.Forbidden:
+                pass
+            except Exception as e:
+                logger.error(f"Error fetching messages from {channel.name}: {e}")
+            finally:
+                timings[channel.id] = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(scan(channel) for channel in channels))
     
-    return messages
+    names = {channel.id: channel.name for channel in channels}
+    for channel_id, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logger.debug(f"Scanned #{names[channel_id]} ({channel_id}) in {seconds * 1000:.0f}ms")
+    logger.info(
+        f"Scanned {len(timings)}/{len(channels)} channels for {user.name} in "
+        f"{time.perf_counter() - started:.2f}s, found {len(found)} messages"
+    )
+    
+    # Snowflake IDs sort by creation time
+    found.sort(key=lambda message: message.id, reverse=True)
+    return [message.content for message in found[:max_messages]]
+
+
+async def get_advice(perspective: str, thread_id: str, assistant_id: str, full_debate: str) -> str:
+    """Ask one side for its final advice, with a fallback if it fails or times out."""
+    try:
+        await backboard.add_message(thread_id, get_advice_prompt(perspective, full_debate))
+        return await backboard.run_assistant(thread_id, assistant_id, timeout=TURN_TIMEOUT)
+    except Exception as e:
+        logger.error(f"{perspective.capitalize()} advice error: {e}")
+        return f"{perspective.capitalize()} Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
 
 
 async def true_alternation(
@@ -152,33 +207,11 @@ async def true_alternation(
     # Generate advice from both bots
     full_debate = "\n".join(debate_lines)
     
-    # Optimist advice
-    optimist_advice_prompt = get_advice_prompt("optimist", full_debate)
-    await backboard.add_message(optimist_thread, optimist_advice_prompt)
-    
-    try:
-        optimist_advice = await backboard.run_assistant(
-            optimist_thread,
-            backboard.optimist_assistant_id,
-            timeout=TURN_TIMEOUT
-        )
-    except Exception as e:
-        logger.error(f"Optimist advice error: {e}")
-        optimist_advice = "Optimist Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
-    
-    # Pessimist advice
-    pessimist_advice_prompt = get_advice_prompt("pessimist", full_debate)
-    await backboard.add_message(pessimist_thread, pessimist_advice_prompt)
-    
-    try:
-        pessimist_advice = await backboard.run_assistant(
-            pessimist_thread,
-            backboard.pessimist_assistant_id,
-            timeout=TURN_TIMEOUT
-        )
-    except Exception as e:
-        logger.error(f"Pessimist advice error: {e}")
-        pessimist_advice = "Pessimist Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
+    # Both sides' advice is requested at once; each falls back on its own
+    optimist_advice, pessimist_advice = await asyncio.gather(
+        get_advice("optimist", optimist_thread, backboard.optimist_assistant_id, full_debate),
+        get_advice("pessimist", pessimist_thread, backboard.pessimist_assistant_id, full_debate)
+    )
     
     return {
         "debate": full_debate,
@@ -304,7 +337,8 @@ async def analyze(interaction: discord.Interaction):
             user_messages = await fetch_user_messages(
                 interaction.guild,
                 interaction.user,
-                limit=100
+                limit=100,
+                max_messages=50
             )
             
             if not user_messages:
@@ -3,75 +3,97 @@ from discord import app_commands
 from discord.ext import commands
 import logging
 import asyncio
-from typing import List, Dict
+import time
+from contextlib import aclosing
+from typing import List, Dict, Optional, Tuple
 import os
 
 from session import session
 from orchestrator import orchestrator
 from backboard_client import backboard
+from thread_pool import thread_pool
+from write_behind import ThreadWriter
+from outbound import ProgressMessage
+from job_queue import analysis_queue, QueueFullError
+from backfill import history_backfill
+from user_cache import UserCache
+from debate_history import DebateHistory
+from metrics import metrics
+from tracing import tracer
 from prompts import (
     get_setup_prompt,
     get_turn_prompt,
     get_advice_prompt,
-    get_user_messages_context
+    get_user_messages_context,
+    get_fast_debate_prompt,
+    parse_fast_debate
 )
 
 logger = logging.getLogger(__name__)
 
+debate_seconds = metrics.histogram(
+    'debate_seconds', "Duration of one player's debate, including advice", labels=('mode', 'outcome')
+)
+turn_seconds = metrics.histogram('debate_turn_seconds', 'Duration of one debate turn', labels=('perspective',))
+
 # Constants
-DEBATE_TURNS = 6
+DEBATE_TURNS = int(os.getenv('DEBATE_TURNS', '6'))
 ANALYSIS_TIMEOUT = 300.0  # 5 minutes total
 TURN_TIMEOUT = 30.0  # 30 seconds per turn
+FAST_DEBATE_TIMEOUT = 90.0  # one call generates the whole debate in fast mode
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'true').lower() == 'true'
+HISTORY_WINDOW = int(os.getenv('DEBATE_HISTORY_WINDOW', '6'))  # lines shown verbatim per turn
+HISTORY_BUDGET = int(os.getenv('DEBATE_HISTORY_BUDGET', '300'))  # est. tokens of history per turn
+BOT_PROFILE = os.getenv('BOT_PROFILE', 'default').lower()  # 'lean' trims intents and caches
 
 
 class OptimistBot(commands.Bot):
     """Optimist Discord bot with slash commands."""
     
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.members = True
-        intents.guilds = True
+        options = {}
+        if BOT_PROFILE == 'lean':
+            # Only guild messages (with content) and interactions are needed;
+            # no member list, member chunking or message cache
+            intents = discord.Intents.none()
+            intents.guilds = True
+            intents.guild_messages = True
+            intents.message_content = True
+            options = {
+                'chunk_guilds_at_startup': False,
+                'member_cache_flags': discord.MemberCacheFlags.none(),
+                'max_messages': None,
+            }
+        else:
+            intents = discord.Intents.default()
+            intents.message_content = True
+            intents.members = True
+            intents.guilds = True
         
-        super().__init__(command_prefix='!opt_', intents=intents)
+        super().__init__(command_prefix='!opt_', intents=intents, **options)
+        self.backfill_task: Optional[asyncio.Task] = None
+        self.user_cache = UserCache(self, ttl=float(os.getenv('USER_CACHE_TTL', '600')))
     
     async def setup_hook(self):
-        """Sync commands on startup."""
+        """Sync commands and start the analysis workers on startup."""
         await self.tree.sync()
         logger.info("Optimist bot commands synced")
+        analysis_queue.start()
     
     async def on_ready(self):
         """Called when bot is ready."""
         logger.info(f"Optimist bot ready: {self.user.name}")
-    
-    async def on_message(self, message: discord.Message):
-        """Buffer messages from general channel."""
-        if message.author.bot:
-            return
         
-        # Check if this is a tracked general channel
-        if message.guild:
-            guild_id = str(message.guild.id)
-            channel_setup = session.get_channel_setup(guild_id)
-            
-            if channel_setup and str(message.channel.id) == channel_setup.general_channel_id:
-                # Buffer this message
-                message_data = {
-                    'content': message.content,
-                    'author_name': message.author.name,
-                    'author_id': str(message.author.id),
-                    'timestamp': message.created_at.isoformat()
-                }
-                
-                # Log the message data
-                logger.debug(
-                    f"Optimist bot buffered | Guild: {guild_id} | "
-                    f"User: {message_data['author_name']} (ID: {message_data['author_id']}) | "
-                    f"Content: {message_data['content'][:50]}{'...' if len(message_data['content']) > 50 else ''}"
-                )
-                
-                orchestrator.add_message(guild_id, str(message.channel.id), message_data)
+        # Pre-create threads for every configured assistant (read from the store after a restart)
+        thread_pool.warm_many(await session.assistant_ids())
         
+        # Fill buffers from channel history in the background (first ready only)
+        if self.backfill_task is None:
+            self.backfill_task = asyncio.create_task(history_backfill.run(self))
+    
+    async def on_message(self, message: discord.Message):
+        """Buffer messages from general channel (the only ingestion path)."""
+        orchestrator.ingest_message(message)
         await self.process_commands(message)
 
 
@@ -87,8 +109,13 @@ def create_optimist_bot() -> OptimistBot:
         player1_room="Player 1's private room",
         player2_room="Player 2's private room",
         optimist_assistant="Optimist assistant ID",
-        pessimist_assistant="Pessimist assistant ID"
+        pessimist_assistant="Pessimist assistant ID",
+        debate_mode="Turns: one request per line (default). Fast: whole debate in one request"
     )
+    @app_commands.choices(debate_mode=[
+        app_commands.Choice(name="Turns", value="turns"),
+        app_commands.Choice(name="Fast", value="fast")
+    ])
     async def setup(
         interaction: discord.Interaction,
         player1: discord.Member,
@@ -97,7 +124,8 @@ def create_optimist_bot() -> OptimistBot:
         player1_room: discord.TextChannel,
         player2_room: discord.TextChannel,
         optimist_assistant: str,
-        pessimist_assistant: str
+        pessimist_assistant: str,
+        debate_mode: Optional[app_commands.Choice[str]] = None
     ):
         """Setup channel configuration and create threads for both players."""
         await interaction.response.defer(ephemeral=True)
@@ -112,7 +140,8 @@ def create_optimist_bot() -> OptimistBot:
                 player2_id=str(player2.id),
                 general_channel_id=str(general.id),
                 player1_room_id=str(player1_room.id),
-                player2_room_id=str(player2_room.id)
+                player2_room_id=str(player2_room.id),
+                debate_mode=debate_mode.value if debate_mode else "turns"
             )
             
             # Create sessions for player1
@@ -129,11 +158,17 @@ def create_optimist_bot() -> OptimistBot:
                 pessimist_assistant_id=pessimist_assistant
             )
             
+            # Have threads ready before the first /analyze
+            thread_pool.warm_many([optimist_assistant, pessimist_assistant])
+            bot.user_cache.put(player1)
+            bot.user_cache.put(player2)
+            
             await interaction.followup.send(
                 f"✅ Setup complete!\n\n"
                 f"**Players:** {player1.mention}, {player2.mention}\n"
                 f"**General:** {general.mention}\n"
-                f"**Rooms:** {player1_room.mention}, {player2_room.mention}\n\n"
+                f"**Rooms:** {player1_room.mention}, {player2_room.mention}\n"
+                f"**Debate mode:** {debate_mode.name if debate_mode else 'Turns'}\n\n"
                 f"Use `/analyze` to start debates!",
                 ephemeral=True
             )
@@ -145,36 +180,16 @@ def create_optimist_bot() -> OptimistBot:
                 ephemeral=True
             )
     
-    @bot.tree.command(name="analyze", description="Run debate analysis on both players")
-    async def analyze(interaction: discord.Interaction):
-        """Analyze both players with true alternation debate."""
-        await interaction.response.defer()
-        
-        guild_id = str(interaction.guild.id)
-        
-        # Check cooldown
-        if not orchestrator.can_analyze():
-            remaining = orchestrator.time_until_ready()
-            await interaction.followup.send(
-                f"⏳ Analysis on cooldown. Try again in {int(remaining)} seconds."
-            )
-            return
-        
-        # Acquire lock
-        if orchestrator.analyze_lock.locked():
-            await interaction.followup.send(
-                "⏳ An analysis is already running. Please wait."
-            )
-            return
-        
-        async with orchestrator.analyze_lock:
-            orchestrator.update_analyze_timestamp()
+    async def run_analysis(interaction: discord.Interaction, guild_id: str, progress: ProgressMessage) -> None:
+        """Run a queued analysis once a worker picks it up, reporting through one progress message."""
+        async with orchestrator.analysis_slot(guild_id):
+            orchestrator.update_analyze_timestamp(guild_id)
             
             try:
                 # Get channel setup
                 channel_setup = session.get_channel_setup(guild_id)
                 if not channel_setup:
-                    await interaction.followup.send(
+                    await progress.update(
                         "❌ No setup found. Use `/setup` first!"
                     )
                     return
@@ -184,7 +199,7 @@ def create_optimist_bot() -> OptimistBot:
                 p2_session = session.get_user_session(channel_setup.player2_id)
                 
                 if not p1_session or not p2_session:
-                    await interaction.followup.send(
+                    await progress.update(
                         "❌ Player sessions not found. Re-run `/setup`!"
                     )
                     return
@@ -195,234 +210,564 @@ def create_optimist_bot() -> OptimistBot:
                 p2_room = bot.get_channel(int(channel_setup.player2_room_id))
                 
                 if not all([general_channel, p1_room, p2_room]):
-                    await interaction.followup.send(
+                    await progress.update(
                         "❌ Cannot access configured channels!"
                     )
                     return
                 
-                # Get buffered messages
-                messages = orchestrator.get_messages(guild_id, channel_setup.general_channel_id)
+                # Count buffered messages; the transcript itself is rendered
+                # incrementally by the buffer rather than copied out here
+                general_id = channel_setup.general_channel_id
+                message_count = orchestrator.get_message_count(guild_id, general_id)
                 
-                if not messages:
-                    await interaction.followup.send(
+                if not message_count:
+                    await progress.update(
                         "❌ No messages in general channel to analyze."
                     )
                     return
                 
-                await interaction.followup.send(
-                    f"🔍 Analyzing {len(messages)} messages from general chat..."
+                await progress.update(
+                    f"🔍 Analyzing {message_count} messages from general chat..."
                 )
                 
                 # Get player info
-                player1 = await bot.fetch_user(int(channel_setup.player1_id))
-                player2 = await bot.fetch_user(int(channel_setup.player2_id))
+                player1, player2 = await asyncio.gather(
+                    bot.user_cache.get(int(channel_setup.player1_id)),
+                    bot.user_cache.get(int(channel_setup.player2_id))
+                )
                 
-                # Run analysis for both players
-                try:
-                    # Analyze player 1
-                    await orchestrator.post_as_optimist(
-                        p1_room,
-                        f"🎭 Starting debate analysis for {player1.display_name}..."
-                    )
-                    
-                    p1_result = await asyncio.wait_for(
-                        run_true_alternation(
-                            user_id=channel_setup.player1_id,
-                            username=player1.display_name,
-                            user_messages=messages,
-                            user_session=p1_session,
-                            output_channel=p1_room
+                # Run both players' analyses concurrently; each has its own
+                # timeout and a failure in one does not cancel the other
+                (p1_ok, p1_status), (p2_ok, p2_status) = await asyncio.gather(
+                    run_player_analysis(
+                        user_id=channel_setup.player1_id,
+                        username=player1.display_name,
+                        user_messages=[],
+                        user_session=p1_session,
+                        context=orchestrator.get_user_context(
+                            guild_id, general_id, player1.display_name
                         ),
-                        timeout=ANALYSIS_TIMEOUT
-                    )
-                    
-                    # Analyze player 2
-                    await orchestrator.post_as_optimist(
-                        p2_room,
-                        f"🎭 Starting debate analysis for {player2.display_name}..."
-                    )
-                    
-                    p2_result = await asyncio.wait_for(
-                        run_true_alternation(
-                            user_id=channel_setup.player2_id,
-                            username=player2.display_name,
-                            user_messages=messages,
-                            user_session=p2_session,
-                            output_channel=p2_room
+                        output_channel=p1_room,
+                        debate_mode=channel_setup.debate_mode
+                    ),
+                    run_player_analysis(
+                        user_id=channel_setup.player2_id,
+                        username=player2.display_name,
+                        user_messages=[],
+                        user_session=p2_session,
+                        context=orchestrator.get_user_context(
+                            guild_id, general_id, player2.display_name
                         ),
-                        timeout=ANALYSIS_TIMEOUT
+                        output_channel=p2_room,
+                        debate_mode=channel_setup.debate_mode
                     )
-                    
-                    await interaction.followup.send(
-                        "✅ Analysis complete! Check the player rooms for results."
-                    )
-                    
-                except asyncio.TimeoutError:
-                    await interaction.followup.send(
-                        f"❌ Analysis timed out after {ANALYSIS_TIMEOUT}s. Please try again."
-                    )
-                    logger.error("Analysis timeout")
+                )
+                
+                headline = (
+                    "✅ Analysis complete! Check the player rooms for results."
+                    if p1_ok and p2_ok
+                    else "⚠️ Analysis finished with errors. Check the player rooms for details."
+                )
+                await progress.update(f"{headline}\n{p1_status}\n{p2_status}")
                 
             except Exception as e:
                 logger.error(f"Analysis error: {e}")
-                await interaction.followup.send(
+                await progress.update(
                     f"❌ Analysis failed: {str(e)}"
                 )
     
+    @bot.tree.command(name="analyze", description="Run debate analysis on both players")
+    async def analyze(interaction: discord.Interaction):
+        """Queue an analysis of both players with true alternation debate."""
+        await interaction.response.defer()
+        
+        guild_id = str(interaction.guild.id)
+        
+        # Check this guild's cooldown
+        if not orchestrator.can_analyze(guild_id):
+            remaining = orchestrator.time_until_ready(guild_id)
+            await interaction.followup.send(
+                f"⏳ Analysis on cooldown. Try again in {int(remaining)} seconds."
+            )
+            return
+        
+        # One queued or running analysis per guild
+        existing = analysis_queue.get_guild_job(guild_id)
+        if existing:
+            position = analysis_queue.position(existing)
+            if position:
+                await interaction.followup.send(
+                    f"⏳ An analysis for this server is already queued at position {position}. Please wait."
+                )
+            else:
+                await interaction.followup.send(
+                    "⏳ An analysis is already running in this server. Please wait."
+                )
+            return
+        
+        # Queue position, start and progress all edit one status message
+        progress = ProgressMessage(interaction)
+        queued = {'notify': False}
+        
+        async def on_start():
+            if queued['notify']:
+                try:
+                    await progress.update("▶️ Your analysis is starting now.")
+                except discord.HTTPException as e:
+                    logger.warning(f"Could not notify start of queued analysis: {e}")
+        
+        # The trace starts with the interaction, so it includes time spent queued
+        trace_id = tracer.new_trace_id()
+        requested_at = time.perf_counter()
+        
+        async def run_traced():
+            with tracer.trace("analyze", trace_id=trace_id, started=requested_at, guild_id=guild_id):
+                tracer.record("analyze.queued", requested_at)
+                await run_analysis(interaction, guild_id, progress)
+        
+        try:
+            job = analysis_queue.submit(
+                guild_id,
+                run=run_traced,
+                on_start=on_start
+            )
+        except QueueFullError:
+            await interaction.followup.send(
+                "❌ The analysis queue is full right now. Please try again in a few minutes."
+            )
+            return
+        
+        # Let the worker pick it up if one is free before reporting a queue position
+        await asyncio.sleep(0)
+        position = analysis_queue.position(job)
+        if position:
+            queued['notify'] = True
+            eta = analysis_queue.estimate_wait(position)
+            await progress.update(
+                f"📋 Analysis queued at position {position} (ETA ~{int(eta)} seconds). "
+                f"You'll be told when it starts."
+            )
+    
     return bot
 
 
+async def run_player_analysis(
+    user_id: str,
+    username: str,
+    user_messages: List[str],
+    user_session: 'session.UserSession',
+    output_channel: discord.TextChannel,
+    context: Optional[str] = None,
+    debate_mode: str = "turns"
+) -> Tuple[bool, str]:
+    """
+    Run one player's debate with its own timeout and error isolation.
+    Returns (succeeded, one-line status for the final summary).
+    
+    `debate_mode` is the guild's setting: "fast" generates the whole debate
+    in one request, anything else runs it turn by turn.
+    """
+    started = time.perf_counter()
+    try:
+        orchestrator.queue_as_optimist(
+            output_channel,
+            f"🎭 Starting debate analysis for {username}..."
+        )
+        
+        run_debate = run_fast_debate if debate_mode == "fast" else run_true_alternation
+        # Own this debate's posts, so a failure cancels only them and not another player's
+        with tracer.span("debate", username=username, mode=debate_mode), \
+                orchestrator.outbound.owned_by(object()):
+            try:
+                await asyncio.wait_for(
+                    run_debate(
+                        user_id=user_id,
+                        username=username,
+                        user_messages=user_messages,
+                        user_session=user_session,
+                        output_channel=output_channel,
+                        context=context
+                    ),
+                    timeout=ANALYSIS_TIMEOUT
+                )
+            except BaseException:
+                # Whatever phase it failed in (turns or advice), drop its posts still queued
+                orchestrator.outbound.cancel(output_channel.id)
+                raise
+        debate_seconds.observe(time.perf_counter() - started, mode=debate_mode, outcome='ok')
+        return True, f"✅ {username}: complete"
+        
+    except asyncio.TimeoutError:
+        debate_seconds.observe(time.perf_counter() - started, mode=debate_mode, outcome='timeout')
+        logger.error(f"Analysis timeout for {username}")
+        await orchestrator.post_as_optimist(
+            output_channel,
+            f"❌ Analysis timed out after {ANALYSIS_TIMEOUT}s. Please try again."
+        )
+        return False, f"❌ {username}: timed out after {ANALYSIS_TIMEOUT}s"
+    except Exception as e:
+        debate_seconds.observe(time.perf_counter() - started, mode=debate_mode, outcome='error')
+        logger.error(f"Analysis error for {username}: {e}")
+        return False, f"❌ {username}: failed ({str(e)})"
+
+
+def extract_debate_line(response: str) -> str:
+    """Reduce a turn response to its first non-empty line, capped at the word limit."""
+    debate_line = None
+    for line in response.strip().split('\n'):
+        if line.strip():
+            debate_line = line.strip()
+            break
+    
+    if not debate_line:
+        return "[No response]"
+    
+    # Enforce word limit (18 words)
+    words = debate_line.split()
+    if len(words) > 20:  # prefix + 18 words max
+        debate_line = " ".join(words[:20]) + "..."
+    
+    return debate_line
+
+
+def render_partial_line(text: str) -> str:
+    """Render a debate line that is still streaming in."""
+    if not text.strip():
+        return ""
+    return f"```{text.strip().splitlines()[0]}```"
+
+
+async def _single_chunk(text: str):
+    """Async iterator yielding one complete text, for showing a finished response like a stream."""
+    yield text
+
+
+async def _resume(first_chunk: 'asyncio.Future[str]', chunks):
+    """Re-attach an already requested first chunk to the rest of its stream."""
+    try:
+        yield await first_chunk
+    except StopAsyncIteration:
+        return
+    async for chunk in chunks:
+        yield chunk
+
+
+async def generate_advice(
+    perspective: str,
+    thread_id: str,
+    full_debate: str,
+    output_channel: discord.TextChannel,
+    thread_writer: Optional[ThreadWriter] = None,
+    placeholder: Optional[asyncio.Future] = None
+) -> str:
+    """
+    Ask one side for its final advice and show it in the output channel.
+    
+    With a placeholder (a queued message future), the advice replaces that
+    message when ready, so both sides can be generated at once and still
+    appear in order. Streams the advice when streaming is enabled.
+    Returns the advice text, or a fallback if generation failed.
+    """
+    advice_prompt = get_advice_prompt(perspective, full_debate)
+    if thread_writer:
+        advice_prompt = thread_writer.with_pending(thread_id, advice_prompt)
+    is_optimist = perspective == "optimist"
+    stream_as = orchestrator.stream_as_optimist if is_optimist else orchestrator.stream_as_pessimist
+    render = lambda text: f"**{text.strip()}**" if text.strip() else ""
+    fallback = f"{perspective.capitalize()} Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
+    message = None
+    advice = ""
+    
+    try:
+        # Requests start before waiting for the placeholder to be posted
+        if STREAM_RESPONSES:
+            # Closed on the way out so a timed-out stream releases its connection at once
+            async with aclosing(backboard.stream_message(
+                thread_id=thread_id,
+                content=advice_prompt,
+                timeout=TURN_TIMEOUT,
+                memory="Auto"
+            )) as chunks:
+                first_chunk = asyncio.ensure_future(anext(chunks))
+                try:
+                    message = await placeholder if placeholder else None
+                    advice = await asyncio.wait_for(
+                        stream_as(output_channel, _resume(first_chunk, chunks), render=render, placeholder=message),
+                        timeout=TURN_TIMEOUT
+                    )
+                finally:
+                    # Don't leave the first read running if we never got to consume it
+                    first_chunk.cancel()
+                    await asyncio.gather(first_chunk, return_exceptions=True)
+            if advice.strip():
+                return advice
+        else:
+            request = asyncio.ensure_future(backboard.send_message(
+                thread_id=thread_id,
+                content=advice_prompt,
+                timeout=TURN_TIMEOUT,
+                memory="Auto"
+            ))
+            try:
+                message = await placeholder if placeholder else None
+                advice = await request
+            finally:
+                request.cancel()
+    except asyncio.CancelledError:
+        # Timed out or cancelled during the advice phase: don't leave "Generating..." up for good
+        if message is None and placeholder:
+            # Resolves to None if it was dropped from the queue before being sent
+            message = await placeholder
+        if message is not None:
+            await stream_as(output_channel, _single_chunk(fallback), render=render, placeholder=message)
+        raise
+    except Exception as e:
+        logger.error(f"{perspective.capitalize()} advice error: {e}")
+    
+    if not advice.strip():
+        # Errors and empty replies both replace the placeholder with the fallback
+        advice = fallback
+    
+    # Post advice (replacing the placeholder, or any partial stream shown in it)
+    if message is None and placeholder:
+        message = await placeholder
+    await stream_as(output_channel, _single_chunk(advice), render=render, placeholder=message)
+    return advice
+
+
 async def run_true_alternation(
     user_id: str,
     username: str,
     user_messages: List[str],
     user_session: 'session.UserSession',
-    output_channel: discord.TextChannel
+    output_channel: discord.TextChannel,
+    context: Optional[str] = None
 ) -> Dict[str, str]:
     """
     Run true alternation debate between optimist and pessimist.
     Posts messages in real-time to the output channel.
     Returns dict with 'debate', 'optimist_advice', 'pessimist_advice'.
+    
+    `context` is a prebuilt user context (see Orchestrator.get_user_context);
+    without it one is built from `user_messages`.
     """
     # Setup context
-    context = get_user_messages_context(user_messages, username)
+    if context is None:
+        context = get_user_messages_context(user_messages, username)
     
     # Initialize both threads with setup prompts
     setup_optimist = get_setup_prompt("optimist", username)
     setup_pessimist = get_setup_prompt("pessimist", username)
 
-    user_session.optimist_thread_id = await backboard.create_thread(
-        user_session.optimist_assistant_id
-    )
-    user_session.pessimist_thread_id = await backboard.create_thread(
-        user_session.pessimist_assistant_id
+    # Check out pre-warmed threads (created on demand if the pool is empty)
+    # Threads are kept local: concurrent analyses may share a UserSession
+    optimist_thread, pessimist_thread = await asyncio.gather(
+        thread_pool.acquire(user_session.optimist_assistant_id),
+        thread_pool.acquire(user_session.pessimist_assistant_id)
     )
 
+    # Context relays are folded into each thread's next request, and Discord
+    # posts are queued per channel in order, so neither waits on the LLM path
+    thread_writer = ThreadWriter(backboard)
+    
     # Seed context without invoking the LLM
-    await backboard.send_message(
-        thread_id=user_session.optimist_thread_id,
-        content=f"{setup_optimist}\n\n{context}",
-        send_to_llm=False,
-        memory="off"
-    )
-    await backboard.send_message(
-        thread_id=user_session.pessimist_thread_id,
-        content=f"{setup_pessimist}\n\n{context}",
-        send_to_llm=False,
-        memory="off"
+    await asyncio.gather(
+        backboard.send_message(
+            thread_id=optimist_thread,
+            content=f"{setup_optimist}\n\n{context}",
+            send_to_llm=False,
+            memory="off"
+        ),
+        backboard.send_message(
+            thread_id=pessimist_thread,
+            content=f"{setup_pessimist}\n\n{context}",
+            send_to_llm=False,
+            memory="off"
+        )
     )
     
     # Run debate turns
-    debate_lines = []
+    history = DebateHistory(window=HISTORY_WINDOW, budget_tokens=HISTORY_BUDGET)
     
     for turn in range(DEBATE_TURNS):
+        turn_started = time.perf_counter()
+        
         # Determine who speaks this turn
         is_optimist_turn = (turn % 2 == 0)
         perspective = "optimist" if is_optimist_turn else "pessimist"
-        current_thread = user_session.optimist_thread_id if is_optimist_turn else user_session.pessimist_thread_id
-        other_thread = user_session.pessimist_thread_id if is_optimist_turn else user_session.optimist_thread_id
+        current_thread = optimist_thread if is_optimist_turn else pessimist_thread
+        other_thread = pessimist_thread if is_optimist_turn else optimist_thread
         
-        # Build debate history
-        debate_history = "\n".join(debate_lines) if debate_lines else "No debate yet."
+        # Recent lines plus a running summary, capped to the history budget
+        debate_history = history.render()
         
-        # Create turn prompt
-        turn_prompt = get_turn_prompt(perspective, turn, debate_history)
+        # Create turn prompt, preceded by anything relayed to this thread
+        turn_prompt = thread_writer.with_pending(
+            current_thread,
+            get_turn_prompt(perspective, turn, debate_history)
+        )
         
         # Send message and get response
         try:
-            response = await backboard.send_message(
-                thread_id=current_thread,
-                content=turn_prompt,
-                timeout=TURN_TIMEOUT,
-                memory="Auto"
-            )
-            
-            # Extract first non-empty line from response
-            lines = response.strip().split('\n')
-            debate_line = None
-            for line in lines:
-                if line.strip():
-                    debate_line = line.strip()
-                    break
-            
-            if not debate_line:
-                debate_line = "[No response]"
-            
-            # Enforce word limit (18 words)
-            words = debate_line.split()
-            if len(words) > 20:  # prefix + 18 words max
-                debate_line = " ".join(words[:20]) + "..."
+            if STREAM_RESPONSES:
+                # Show the line in Discord while it is still being generated
+                stream_as = orchestrator.stream_as_optimist if is_optimist_turn else orchestrator.stream_as_pessimist
+                async with aclosing(backboard.stream_message(
+                    thread_id=current_thread,
+                    content=turn_prompt,
+                    timeout=TURN_TIMEOUT,
+                    memory="Auto"
+                )) as chunks:
+                    response = await asyncio.wait_for(
+                        stream_as(
+                            output_channel,
+                            chunks,
+                            render=render_partial_line,
+                            finalize=lambda text: f"```{extract_debate_line(text)}```"
+                        ),
+                        timeout=TURN_TIMEOUT
+                    )
+                debate_line = extract_debate_line(response)
+            else:
+                response = await backboard.send_message(
+                    thread_id=current_thread,
+                    content=turn_prompt,
+                    timeout=TURN_TIMEOUT,
+                    memory="Auto"
+                )
+                debate_line = extract_debate_line(response)
             
-            debate_lines.append(debate_line)
+            history.add(debate_line)
             
             # Add this line to the OTHER bot's thread for context (no LLM call)
-            await backboard.send_message(
-                thread_id=other_thread,
-                content=f"The other debater said: {debate_line}",
-                send_to_llm=False,
-                memory="off"
-            )
+            thread_writer.defer(other_thread, f"The other debater said: {debate_line}")
             
-            # Post to Discord using appropriate bot
-            if is_optimist_turn:
-                await orchestrator.post_as_optimist(output_channel, f"```{debate_line}```")
-            else:
-                await orchestrator.post_as_pessimist(output_channel, f"```{debate_line}```")
+            # Post to Discord using appropriate bot (already shown when streaming)
+            if not STREAM_RESPONSES:
+                queue_as = orchestrator.queue_as_optimist if is_optimist_turn else orchestrator.queue_as_pessimist
+                queue_as(output_channel, f"```{debate_line}```")
             
         except TimeoutError as e:
             logger.error(f"Turn {turn} timeout: {e}")
             debate_line = "[Timeout]"
-            debate_lines.append(debate_line)
-            await orchestrator.post_as_optimist(output_channel, f"⚠️ Turn {turn} timed out")
+            history.add(debate_line)
+            orchestrator.queue_as_optimist(output_channel, f"⚠️ Turn {turn} timed out")
         except Exception as e:
             logger.error(f"Turn {turn} error: {e}")
             debate_line = "[Error]"
-            debate_lines.append(debate_line)
-            await orchestrator.post_as_optimist(output_channel, f"⚠️ Turn {turn} error: {str(e)}")
+            history.add(debate_line)
+            orchestrator.queue_as_optimist(output_channel, f"⚠️ Turn {turn} error: {str(e)}")
+        
+        turn_seconds.observe(time.perf_counter() - turn_started, perspective=perspective)
+        tracer.record("debate.turn", turn_started, turn=turn, perspective=perspective)
+    
+    await orchestrator.outbound.drain(output_channel.id)
     
     # Generate advice from both bots
-    full_debate = "\n".join(debate_lines)
+    full_debate = history.full()
     
-    # Optimist advice
-    await orchestrator.post_as_optimist(output_channel, "\n**💡 Generating Optimist advice...**")
-    optimist_advice_prompt = get_advice_prompt("optimist", full_debate)
+    # Both sides' advice is generated at once; placeholders keep them in order
+    optimist_placeholder = orchestrator.queue_as_optimist(
+        output_channel, "**💡 Generating Optimist advice...**", coalesce=False
+    )
+    pessimist_placeholder = orchestrator.queue_as_pessimist(
+        output_channel, "**💡 Generating Pessimist advice...**", coalesce=False
+    )
+    advice_started = time.perf_counter()
+    optimist_advice, pessimist_advice = await asyncio.gather(
+        generate_advice(
+            "optimist",
+            optimist_thread,
+            full_debate,
+            output_channel,
+            thread_writer,
+            optimist_placeholder
+        ),
+        generate_advice(
+            "pessimist",
+            pessimist_thread,
+            full_debate,
+            output_channel,
+            thread_writer,
+            pessimist_placeholder
+        )
+    )
+    tracer.record("debate.advice", advice_started)
     
-    try:
-        optimist_advice = await backboard.send_message(
-            thread_id=user_session.optimist_thread_id,
-            content=optimist_advice_prompt,
-            timeout=TURN_TIMEOUT,
-            memory="Auto"
+    # Relays that never got folded into a request still belong in the thread
+    thread_writer.flush()
+    await thread_writer.drain()
+    
+    return {
+        "debate": full_debate,
+        "optimist_advice": optimist_advice.strip(),
+        "pessimist_advice": pessimist_advice.strip()
+    }
+
+
+async def run_fast_debate(
+    user_id: str,
+    username: str,
+    user_messages: List[str],
+    user_session: 'session.UserSession',
+    output_channel: discord.TextChannel,
+    context: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Generate the whole debate and both sides' advice in one request.
+    
+    The response is parsed into lines that are posted under each persona in
+    turn order, like run_true_alternation, but with one LLM round trip
+    instead of one per turn plus two for advice.
+    Returns dict with 'debate', 'optimist_advice', 'pessimist_advice'.
+    """
+    if context is None:
+        context = get_user_messages_context(user_messages, username)
+    
+    # The prompt carries everything it needs, so no thread memory is involved
+    prompt = get_fast_debate_prompt(username, context, DEBATE_TURNS)
+    response = backboard.get_cached(prompt)
+    cached = response is not None
+    if not cached:
+        # Thread stays local: concurrent analyses may share a UserSession
+        thread_id = await thread_pool.acquire(user_session.optimist_assistant_id)
+        response = await backboard.send_message(
+            thread_id=thread_id,
+            content=prompt,
+            timeout=FAST_DEBATE_TIMEOUT,
+            memory="off"
         )
-    except Exception as e:
-        logger.error(f"Optimist advice error: {e}")
-        optimist_advice = "Optimist Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
     
-    # Post optimist advice
-    for chunk in orchestrator.split_message(f"**{optimist_advice.strip()}**"):
-        await orchestrator.post_as_optimist(output_channel, chunk)
+    parsed = parse_fast_debate(response, DEBATE_TURNS)
+    debate_lines = [extract_debate_line(line) for line in parsed["debate_lines"]]
+    if all(line == "[No response]" for line in debate_lines):
+        raise ValueError("fast debate response could not be parsed")
     
-    # Pessimist advice
-    await orchestrator.post_as_pessimist(output_channel, "\n**💡 Generating Pessimist advice...**")
-    pessimist_advice_prompt = get_advice_prompt("pessimist", full_debate)
+    # Only a complete reply is cached, so a malformed one is asked for again next time
+    if not cached and "[No response]" not in debate_lines and all(
+        parsed[f"{perspective}_advice"] for perspective in ("optimist", "pessimist")
+    ):
+        backboard.cache_response(prompt, response)
     
-    try:
-        pessimist_advice = await backboard.send_message(
-            thread_id=user_session.pessimist_thread_id,
-            content=pessimist_advice_prompt,
-            timeout=TURN_TIMEOUT,
-            memory="Auto"
+    for turn, debate_line in enumerate(debate_lines):
+        queue_as = orchestrator.queue_as_optimist if turn % 2 == 0 else orchestrator.queue_as_pessimist
+        queue_as(output_channel, f"```{debate_line}```")
+    
+    advice = {}
+    for perspective, queue_as in (
+        ("optimist", orchestrator.queue_as_optimist),
+        ("pessimist", orchestrator.queue_as_pessimist)
+    ):
+        text = parsed[f"{perspective}_advice"]
+        advice[perspective] = f"1) {text}" if text else (
+            f"{perspective.capitalize()} Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
         )
-    except Exception as e:
-        logger.error(f"Pessimist advice error: {e}")
-        pessimist_advice = "Pessimist Advice:\n1) Unable to generate\n2) Please try again\n3) Error occurred"
+        queue_as(output_channel, f"**{advice[perspective]}**", coalesce=False)
     
-    # Post pessimist advice
-    for chunk in orchestrator.split_message(f"**{pessimist_advice.strip()}**"):
-        await orchestrator.post_as_pessimist(output_channel, chunk)
+    await orchestrator.outbound.drain(output_channel.id)
     
     return {
-        "debate": full_debate,
-        "optimist_advice": optimist_advice.strip(),
-        "pessimist_advice": pessimist_advice.strip()
+        "debate": "\n".join(debate_lines),
+        "optimist_advice": advice["optimist"].strip(),
+        "pessimist_advice": advice["pessimist"].strip()
     }
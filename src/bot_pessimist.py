@@ -1,60 +1,82 @@
 import discord
 from discord.ext import commands
+import asyncio
 import logging
-
-from orchestrator import orchestrator
-from session import session
+import os
+from typing import Union
 
 logger = logging.getLogger(__name__)
 
+# 'rest' posts over HTTP only; 'gateway' runs a full second bot connection
+PESSIMIST_MODE = os.getenv('PESSIMIST_MODE', 'rest').lower()
+BOT_PROFILE = os.getenv('BOT_PROFILE', 'default').lower()
+
 
 class PessimistBot(commands.Bot):
-    """Pessimist Discord bot (no commands, only for posting)."""
+    """
+    Pessimist Discord bot (no commands, only for posting).
+    
+    Messages are buffered by the Optimist bot alone, so this bot does not
+    ingest anything.
+    """
     
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.members = True
-        intents.guilds = True
+        options = {}
+        if BOT_PROFILE == 'lean':
+            # Posting only needs the guild/channel cache
+            intents = discord.Intents.none()
+            intents.guilds = True
+            options = {
+                'chunk_guilds_at_startup': False,
+                'member_cache_flags': discord.MemberCacheFlags.none(),
+                'max_messages': None,
+            }
+        else:
+            intents = discord.Intents.default()
+            intents.message_content = True
+            intents.members = True
+            intents.guilds = True
         
-        super().__init__(command_prefix='!pess_', intents=intents)
+        super().__init__(command_prefix='!pess_', intents=intents, **options)
     
     async def on_ready(self):
         """Called when bot is ready."""
         logger.info(f"Pessimist bot ready: {self.user.name}")
+
+
+class PessimistPoster(discord.Client):
+    """
+    REST-only Pessimist account.
     
-    async def on_message(self, message: discord.Message):
-        """Buffer messages from general channel."""
-        if message.author.bot:
-            return
-        
-        # Check if this is a tracked general channel
-        if message.guild:
-            guild_id = str(message.guild.id)
-            channel_setup = session.get_channel_setup(guild_id)
-            
-            if channel_setup and str(message.channel.id) == channel_setup.general_channel_id:
-                # Buffer this message WITH USER INFO
-                message_data = {
-                    'content': message.content,
-                    'author_name': message.author.name,
-                    'author_id': str(message.author.id),
-                    'timestamp': message.created_at.isoformat()
-                }
-                
-                # Log the message data
-                logger.debug(
-                    f"Pessimist bot buffered | Guild: {guild_id} | "
-                    f"User: {message_data['author_name']} (ID: {message_data['author_id']}) | "
-                    f"Content: {message_data['content'][:50]}{'...' if len(message_data['content']) > 50 else ''}"
-                )
-                
-                orchestrator.add_message(guild_id, str(message.channel.id), message_data)
-        
-        await self.process_commands(message)
+    Logs in over HTTP and never opens a gateway connection, so there is no
+    second event stream or member cache; channels are addressed by ID.
+    """
+    
+    def __init__(self):
+        super().__init__(intents=discord.Intents.none())
+        self._stopped = asyncio.Event()
+    
+    def get_channel(self, id: int, /) -> discord.PartialMessageable:
+        """Return a sendable handle for any channel ID (nothing is cached)."""
+        return self.get_partial_messageable(id, type=discord.ChannelType.text)
+    
+    async def start(self, token: str, *, reconnect: bool = True) -> None:
+        """Log in and stay up until closed."""
+        try:
+            await self.login(token)
+            logger.info(f"Pessimist poster ready (REST only): {self.user.name}")
+            await self._stopped.wait()
+        finally:
+            if not self.is_closed():
+                await self.close()
+    
+    async def close(self) -> None:
+        await super().close()
+        self._stopped.set()
 
 
-def create_pessimist_bot() -> PessimistBot:
-    """Create and configure the Pessimist bot."""
-    bot = PessimistBot()
-    return bot
\ No newline at end of file
+def create_pessimist_bot() -> Union[PessimistBot, PessimistPoster]:
+    """Create the Pessimist account client for PESSIMIST_MODE."""
+    if PESSIMIST_MODE == 'gateway':
+        return PessimistBot()
+    return PessimistPoster()
@@ -0,0 +1,78 @@
+import math
+from collections import deque
+from typing import Deque, List
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about 4 characters per token for English)."""
+    return math.ceil(len(text) / 4)
+
+
+def _clip_words(text: str, words: int) -> str:
+    """First `words` words of a line, with an ellipsis if anything was cut."""
+    parts = text.split()
+    if len(parts) <= words:
+        return " ".join(parts)
+    return " ".join(parts[:words]) + "…"
+
+
+class DebateHistory:
+    """
+    Debate lines so far, rendered for turn prompts at a bounded size.
+
+    The last `window` lines are shown verbatim. Older lines are folded into a
+    compact running summary (a clipped gist of each, built locally so it costs
+    no extra LLM call), and the rendering is trimmed to `budget_tokens`:
+    oldest summary entries go first, then the oldest window lines.
+    """
+
+    EARLIER = "Earlier: "
+    SEPARATOR = " | "
+    RECENT = "\n\nRecent:\n"
+
+    def __init__(self, window: int = 6, budget_tokens: int = 300, gist_words: int = 8):
+        self.window = window
+        self.budget_tokens = budget_tokens
+        self.gist_words = gist_words
+        self.lines: List[str] = []
+        # No more entries than could ever fit in the budget
+        self._gists: Deque[str] = deque(maxlen=budget_tokens * 2)
+
+    def add(self, line: str) -> None:
+        """Record the next debate line."""
+        self.lines.append(line)
+        if len(self.lines) > self.window:
+            folded = self.lines[-self.window - 1]
+            self._gists.append(_clip_words(folded, self.gist_words))
+
+    def full(self) -> str:
+        """Every line, for the final advice prompt."""
+        return "\n".join(self.lines)
+
+    def render(self) -> str:
+        """History for the next turn prompt, within the token budget."""
+        if not self.lines:
+            return "No debate yet."
+
+        # The newest lines have priority; drop the oldest until they fit on their own
+        recent = self.lines[-self.window:]
+        while len(recent) > 1 and estimate_tokens("\n".join(recent)) > self.budget_tokens:
+            recent.pop(0)
+        recent_text = "\n".join(recent)
+        if estimate_tokens(recent_text) > self.budget_tokens:
+            # A single oversized line: clip it to fit
+            return recent_text[:self.budget_tokens * 4]
+
+        # Fill what is left of the budget with the newest summary entries
+        room = self.budget_tokens * 4 - len(recent_text) - len(self.EARLIER) - len(self.RECENT)
+        chosen: List[str] = []
+        for gist in reversed(self._gists):
+            cost = len(gist) + (len(self.SEPARATOR) if chosen else 0)
+            if cost > room:
+                break
+            room -= cost
+            chosen.append(gist)
+        if not chosen:
+            return recent_text
+        chosen.reverse()
+        return self.EARLIER + self.SEPARATOR.join(chosen) + self.RECENT + recent_text
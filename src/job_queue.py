@@ -0,0 +1,203 @@
+import os
+import asyncio
+import time
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the analysis queue cannot take another job."""
+
+
+@dataclass
+class AnalysisJob:
+    """One queued /analyze request."""
+    guild_id: str
+    run: Callable[[], Awaitable[None]]
+    on_start: Optional[Callable[[], Awaitable[None]]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class AnalysisQueue:
+    """
+    Bounded queue of analysis jobs served by a fixed pool of async workers.
+
+    Jobs are dispatched round-robin across guilds so a guild with many
+    requests cannot starve the others. Recent job durations drive the ETA
+    reported to users.
+    """
+
+    def __init__(self, max_size: int = 20, workers: int = 4, history: int = 20):
+        self.max_size = max_size
+        self.worker_count = workers
+
+        # guild_id -> FIFO of pending jobs; dict order is the round-robin order
+        self._pending: 'OrderedDict[str, Deque[AnalysisJob]]' = OrderedDict()
+        self._available = asyncio.Semaphore(0)
+        self._running: Dict[str, AnalysisJob] = {}
+        self._workers: List[asyncio.Task] = []
+
+        # Recent history for ETA and metrics
+        self._durations: Deque[float] = deque(maxlen=history)
+        self._waits: Deque[float] = deque(maxlen=history)
+        self.default_duration = 120.0
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return sum(len(queue) for queue in self._pending.values())
+
+    @property
+    def active(self) -> int:
+        """Number of jobs currently running."""
+        return len(self._running)
+
+    def start(self) -> None:
+        """Start the worker pool (must be called from a running event loop)."""
+        if self._workers:
+            return
+        for index in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker(index)))
+        logger.info(f"Analysis queue started with {self.worker_count} workers")
+
+    async def close(self) -> None:
+        """Stop the workers."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def get_guild_job(self, guild_id: str) -> Optional[AnalysisJob]:
+        """Return the guild's queued or running job, if any."""
+        if guild_id in self._running:
+            return self._running[guild_id]
+        queue = self._pending.get(guild_id)
+        return queue[0] if queue else None
+
+    def submit(
+        self,
+        guild_id: str,
+        run: Callable[[], Awaitable[None]],
+        on_start: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> AnalysisJob:
+        """
+        Queue a job.
+
+        Raises:
+            QueueFullError: If max_size jobs are already waiting
+        """
+        if self.depth >= self.max_size:
+            self.rejected += 1
+            raise QueueFullError(f"Analysis queue is full ({self.max_size} jobs waiting)")
+
+        job = AnalysisJob(guild_id=guild_id, run=run, on_start=on_start)
+        self._pending.setdefault(guild_id, deque()).append(job)
+        self.submitted += 1
+        self._available.release()
+        return job
+
+    def position(self, job: AnalysisJob) -> int:
+        """
+        1-based position of a job in dispatch order, or 0 if it is running or done.
+        """
+        if job.started_at is not None:
+            return 0
+
+        # Replay the round-robin dispatch over a snapshot of the queues
+        queues = [list(queue) for queue in self._pending.values()]
+        position = 0
+        depth = 0
+        while queues:
+            for queue in queues:
+                candidate = queue[depth] if depth < len(queue) else None
+                if candidate is None:
+                    continue
+                position += 1
+                if candidate is job:
+                    return position
+            depth += 1
+            queues = [queue for queue in queues if depth < len(queue)]
+        return 0
+
+    def average_duration(self) -> float:
+        """Mean duration of recent jobs."""
+        if not self._durations:
+            return self.default_duration
+        return sum(self._durations) / len(self._durations)
+
+    def estimate_wait(self, position: int) -> float:
+        """Estimate seconds until a job at `position` starts."""
+        if position <= 0:
+            return 0.0
+        jobs_ahead = self.active + position - 1
+        if jobs_ahead < self.worker_count:
+            return 0.0
+        return (jobs_ahead // self.worker_count) * self.average_duration()
+
+    def _next_job(self) -> AnalysisJob:
+        """Pop the next job, rotating its guild to the back of the order."""
+        guild_id, queue = next(iter(self._pending.items()))
+        job = queue.popleft()
+        del self._pending[guild_id]
+        if queue:
+            self._pending[guild_id] = queue
+        return job
+
+    async def _worker(self, index: int) -> None:
+        """Run jobs until cancelled."""
+        while True:
+            await self._available.acquire()
+            job = self._next_job()
+
+            job.started_at = time.monotonic()
+            self._waits.append(job.started_at - job.enqueued_at)
+            self._running[job.guild_id] = job
+            try:
+                if job.on_start:
+                    await job.on_start()
+                await job.run()
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Analysis job for guild {job.guild_id} failed: {e}")
+            finally:
+                job.finished_at = time.monotonic()
+                self._durations.append(job.finished_at - job.started_at)
+                self._running.pop(job.guild_id, None)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return queue depth, wait time and throughput metrics."""
+        average_wait = sum(self._waits) / len(self._waits) if self._waits else 0.0
+        return {
+            'depth': self.depth,
+            'active': self.active,
+            'workers': self.worker_count,
+            'max_size': self.max_size,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'average_wait_seconds': average_wait,
+            'average_duration_seconds': self.average_duration(),
+        }
+
+
+# Global analysis queue instance
+analysis_queue = AnalysisQueue(
+    max_size=int(os.getenv('ANALYZE_QUEUE_SIZE', '20')),
+    workers=int(os.getenv('ANALYZE_WORKERS', os.getenv('MAX_CONCURRENT_ANALYSES', '4')))
+)
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from bot_optimist import create_optimist_bot
 from bot_pessimist import create_pessimist_bot
 from orchestrator import orchestrator
+from metrics import metrics, serve_metrics
+from tracing import tracer
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +36,31 @@ logging.getLogger('backboard_client').setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def register_metric_collectors(optimist_bot) -> None:
+    """Export the counters components already keep alongside the pipeline metrics."""
+    from backboard_client import backboard
+    from thread_pool import thread_pool
+    from session import session
+    from job_queue import analysis_queue
+    from backfill import history_backfill
+    
+    metrics.add_collector('outbound', orchestrator.outbound.get_stats)
+    metrics.add_collector('debate_scheduler', orchestrator.scheduler.get_stats)
+    metrics.add_collector('ingest', orchestrator.get_ingest_stats)
+    metrics.add_collector('analysis_queue', analysis_queue.get_stats)
+    metrics.add_collector('thread_pool', thread_pool.get_stats)
+    metrics.add_collector('backboard_pool', backboard.get_pool_stats)
+    metrics.add_collector('backboard_resilience', backboard.get_resilience_stats)
+    metrics.add_collector('backboard_cache', backboard.get_cache_stats)
+    metrics.add_collector('session_store', session.store.get_stats)
+    metrics.add_collector('backfill', history_backfill.get_stats)
+    metrics.add_collector('user_cache', optimist_bot.user_cache.get_stats)
+    if orchestrator.message_log:
+        metrics.add_collector('message_log', orchestrator.message_log.get_stats)
+    if tracer.enabled:
+        metrics.add_collector('tracing', tracer.get_stats)
+
+
 async def main():
     """Run both Discord bots in one process."""
     
@@ -55,6 +82,18 @@ async def main():
     logger.info("Registering bots with orchestrator...")
     orchestrator.set_bots(optimist_bot, pessimist_bot)
     
+    # Refill message buffers from the log so /analyze works right after a restart
+    orchestrator.restore_buffers()
+    
+    # Optional Prometheus endpoint (local only unless METRICS_HOST says otherwise)
+    metrics_runner = None
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        register_metric_collectors(optimist_bot)
+        metrics_runner = await serve_metrics(
+            metrics, int(metrics_port), os.getenv('METRICS_HOST', '127.0.0.1')
+        )
+    
     logger.info("Starting both bots...")
     
     try:
@@ -66,7 +105,15 @@ async def main():
         # Clean up Backboard client
         logger.info("Cleaning up Backboard client...")
         from backboard_client import backboard
+        from thread_pool import thread_pool
+        from session import session
+        await thread_pool.close()
         await backboard.close()
+        await session.close()
+        await orchestrator.close()
+        await tracer.close()
+        if metrics_runner:
+            await metrics_runner.cleanup()
         logger.info("Shutdown complete")
 
 
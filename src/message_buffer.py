@@ -0,0 +1,231 @@
+import sys
+import heapq
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from prompts import format_message_line
+
+if TYPE_CHECKING:
+    import discord
+
+
+class MessageRecord:
+    """One buffered Discord message, stored compactly (integer IDs and epoch-ms timestamp)."""
+
+    __slots__ = ('message_id', 'author_id', 'timestamp_ms', 'author_name', 'content')
+
+    def __init__(
+        self,
+        message_id: int,
+        author_id: int,
+        timestamp_ms: int,
+        author_name: str,
+        content: str
+    ):
+        self.message_id = message_id
+        self.author_id = author_id
+        self.timestamp_ms = timestamp_ms
+        # Names repeat across every message a user sends; share one string
+        self.author_name = sys.intern(author_name)
+        self.content = content
+
+    @classmethod
+    def from_dict(cls, message_data: Dict[str, str]) -> 'MessageRecord':
+        """Build a record from the legacy message dict format."""
+        timestamp = message_data.get('timestamp')
+        timestamp_ms = 0
+        if timestamp:
+            parsed = datetime.fromisoformat(timestamp)
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            timestamp_ms = int(parsed.timestamp() * 1000)
+
+        return cls(
+            message_id=int(message_data.get('message_id') or 0),
+            author_id=int(message_data.get('author_id') or 0),
+            timestamp_ms=timestamp_ms,
+            author_name=message_data.get('author_name', 'Unknown'),
+            content=message_data.get('content', '')
+        )
+
+    @classmethod
+    def from_discord(cls, message: 'discord.Message') -> 'MessageRecord':
+        """Build a record from a Discord message."""
+        return cls(
+            message_id=message.id,
+            author_id=message.author.id,
+            timestamp_ms=int(message.created_at.timestamp() * 1000),
+            author_name=message.author.name,
+            content=message.content
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        """Return the legacy dict view ('content', 'author_name', 'author_id', 'timestamp', 'message_id')."""
+        return {
+            'content': self.content,
+            'author_name': self.author_name,
+            'author_id': str(self.author_id),
+            'timestamp': datetime.fromtimestamp(self.timestamp_ms / 1000, tz=timezone.utc).isoformat(),
+            'message_id': str(self.message_id),
+        }
+
+    def format_line(self) -> str:
+        """Render this record as one transcript line for the AI."""
+        return format_message_line(self.author_name, str(self.author_id), self.content)
+
+
+class ChannelBuffer:
+    """
+    Fixed-capacity ring buffer of MessageRecords for one channel.
+
+    Slots are preallocated once; appending past capacity overwrites the oldest
+    record in place. A per-author index (count plus newest position, with each
+    slot linking back to the same author's previous record) is updated on every
+    append and eviction, so per-user counts are O(1) and per-user slices O(k).
+
+    Once rendered, the AI transcript is kept and extended (or trimmed at the
+    front) on each append instead of being rebuilt; other derived strings can
+    be memoized against `version` with memoize().
+    """
+
+    __slots__ = (
+        'capacity', '_slots', '_next_seq', '_count', '_author_counts', '_author_latest', '_prev_seq',
+        '_transcript', '_line_lengths', '_memo', '_memo_version'
+    )
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots: List[Optional[MessageRecord]] = [None] * capacity
+
+        # Record number `seq` lives in slot seq % capacity
+        self._next_seq = 0
+        self._count = 0
+
+        # author_id -> number of buffered records / seq of that author's newest record
+        self._author_counts: Dict[int, int] = {}
+        self._author_latest: Dict[int, int] = {}
+        # Per slot: seq of the same author's previous record (-1 if none)
+        self._prev_seq = array('q', [-1]) * capacity
+
+        # Rendered transcript (None until first requested) and each slot's line length
+        self._transcript: Optional[str] = None
+        self._line_lengths = array('q', [0]) * capacity
+
+        # Strings derived from the buffer, valid for one version
+        self._memo: Dict[str, str] = {}
+        self._memo_version = -1
+
+    @property
+    def version(self) -> int:
+        """Changes whenever a record is appended (and so whenever one is evicted)."""
+        return self._next_seq
+
+    def append(self, record: MessageRecord) -> Optional[MessageRecord]:
+        """Add a record as the newest entry. Returns the evicted record, if any."""
+        seq = self._next_seq
+        slot = seq % self.capacity
+        evicted = self._slots[slot] if self._count == self.capacity else None
+
+        if evicted is not None:
+            # Back-links into evicted slots are ignored by the walk in records_by_author
+            remaining = self._author_counts[evicted.author_id] - 1
+            if remaining:
+                self._author_counts[evicted.author_id] = remaining
+            else:
+                del self._author_counts[evicted.author_id]
+                del self._author_latest[evicted.author_id]
+        else:
+            self._count += 1
+
+        if self._transcript is not None:
+            self._extend_transcript(slot, record, evicted is not None)
+
+        self._slots[slot] = record
+        self._prev_seq[slot] = self._author_latest.get(record.author_id, -1)
+        self._author_latest[record.author_id] = seq
+        self._author_counts[record.author_id] = self._author_counts.get(record.author_id, 0) + 1
+        self._next_seq = seq + 1
+        return evicted
+
+    def _extend_transcript(self, slot: int, record: MessageRecord, evicting: bool) -> None:
+        """Update the cached transcript for a record about to be written to `slot`."""
+        line = record.format_line()
+        transcript = self._transcript
+        if evicting:
+            # Drop the evicted line and its trailing newline from the front
+            transcript = transcript[self._line_lengths[slot] + 1:]
+        self._transcript = f"{transcript}\n{line}" if transcript else line
+        self._line_lengths[slot] = len(line)
+
+    def render_transcript(self, last: Optional[int] = None) -> str:
+        """Newline-joined AI lines for all records (or only the `last` n), oldest first."""
+        if self._transcript is None:
+            lines = []
+            for seq in range(self._next_seq - self._count, self._next_seq):
+                slot = seq % self.capacity
+                line = self._slots[slot].format_line()
+                self._line_lengths[slot] = len(line)
+                lines.append(line)
+            self._transcript = "\n".join(lines)
+
+        if last is None or last >= self._count:
+            return self._transcript
+        if last <= 0:
+            return ""
+        # Slice the tail using the known line lengths instead of re-rendering
+        tail_length = last - 1
+        for seq in range(self._next_seq - last, self._next_seq):
+            tail_length += self._line_lengths[seq % self.capacity]
+        return self._transcript[len(self._transcript) - tail_length:]
+
+    def memoize(self, key: str, build: Callable[[], str]) -> str:
+        """Return `build()` for this buffer version, computing it at most once per version."""
+        if self._memo_version != self._next_seq:
+            self._memo.clear()
+            self._memo_version = self._next_seq
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = build()
+        return value
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[MessageRecord]:
+        """Iterate records from oldest to newest."""
+        for seq in range(self._next_seq - self._count, self._next_seq):
+            yield self._slots[seq % self.capacity]
+
+    def records(self) -> List[MessageRecord]:
+        """Return records from oldest to newest."""
+        return list(self)
+
+    def to_dicts(self) -> List[Dict[str, str]]:
+        """Return records from oldest to newest in the legacy dict format."""
+        return [record.to_dict() for record in self]
+
+    def count_by_author(self, author_id: int) -> int:
+        """Number of buffered records from one author."""
+        return self._author_counts.get(author_id, 0)
+
+    def records_by_author(self, author_id: int) -> List[MessageRecord]:
+        """One author's buffered records, oldest to newest."""
+        oldest = self._next_seq - self._count
+        records = []
+        seq = self._author_latest.get(author_id, -1)
+        while seq >= oldest:
+            slot = seq % self.capacity
+            records.append(self._slots[slot])
+            seq = self._prev_seq[slot]
+        records.reverse()
+        return records
+
+    def top_authors(self, n: int) -> List[Tuple[int, int]]:
+        """The `n` authors with the most buffered records, as (author_id, count)."""
+        return heapq.nlargest(n, self._author_counts.items(), key=lambda item: item[1])
+
+
+MessageLike = Union[MessageRecord, Dict[str, str]]
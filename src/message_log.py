@@ -0,0 +1,273 @@
+import os
+import mmap
+import time
+import zlib
+import struct
+import logging
+from typing import Dict, Iterator, List, Tuple
+
+from message_buffer import MessageRecord
+from write_behind import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+# Per record: crc32 of the rest, message_id, author_id, timestamp_ms, name length, content length,
+# followed by the UTF-8 name and content
+HEADER = struct.Struct('<IQQqHI')
+CHECKSUM = struct.Struct('<I')
+FIELDS = struct.Struct('<QQqHI')
+SEGMENT_SUFFIX = '.seg'
+
+ChannelKey = Tuple[str, str]
+
+
+def encode_record(record: MessageRecord) -> bytes:
+    """Serialize a record as one log entry."""
+    name = record.author_name.encode('utf-8')[:0xFFFF]
+    content = record.content.encode('utf-8')
+    body = FIELDS.pack(
+        record.message_id, record.author_id, record.timestamp_ms, len(name), len(content)
+    ) + name + content
+    return CHECKSUM.pack(zlib.crc32(body)) + body
+
+
+def decode_records(data) -> List[MessageRecord]:
+    """
+    Parse consecutive log entries from a bytes-like buffer.
+
+    Stops at the first truncated or corrupt entry (a torn write at the tail).
+    """
+    records = []
+    offset = 0
+    end = len(data)
+    while offset + HEADER.size <= end:
+        crc, message_id, author_id, timestamp_ms, name_len, content_len = HEADER.unpack_from(data, offset)
+        entry_end = offset + HEADER.size + name_len + content_len
+        if entry_end > end or zlib.crc32(data[offset + 4:entry_end]) != crc:
+            break
+        name_start = offset + HEADER.size
+        records.append(MessageRecord(
+            message_id=message_id,
+            author_id=author_id,
+            timestamp_ms=timestamp_ms,
+            author_name=bytes(data[name_start:name_start + name_len]).decode('utf-8', 'replace'),
+            content=bytes(data[name_start + name_len:entry_end]).decode('utf-8', 'replace')
+        ))
+        offset = entry_end
+    return records
+
+
+class _ChannelLog:
+    """On-disk layout of one channel's log: numbered segment files in a directory."""
+
+    __slots__ = ('path', 'segments', 'active_size', 'entries')
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.segments: List[int] = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX)
+        )
+        self.active_size = 0
+        # Entries written since the last compaction (unknown for existing segments until restored)
+        self.entries = 0
+
+    def segment_path(self, index: int) -> str:
+        return os.path.join(self.path, f"{index:08d}{SEGMENT_SUFFIX}")
+
+    def read_segment(self, index: int) -> List[MessageRecord]:
+        """Memory-map and parse one segment."""
+        path = self.segment_path(index)
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return decode_records(data)
+
+    def read_tail(self, keep: int) -> List[MessageRecord]:
+        """Last `keep` distinct records logged, oldest first, reading segments newest to oldest."""
+        tail: List[MessageRecord] = []
+        seen = set()
+        for index in reversed(self.segments):
+            # Segments left over from an interrupted compaction may repeat records
+            for record in reversed(self.read_segment(index)):
+                if record.message_id in seen:
+                    continue
+                seen.add(record.message_id)
+                tail.append(record)
+                if len(tail) >= keep:
+                    break
+            if len(tail) >= keep:
+                break
+        tail.reverse()
+        # Backfilled history is appended after newer live messages; restore time order
+        tail.sort(key=lambda record: record.timestamp_ms)
+        return tail
+
+
+class MessageLog:
+    """
+    Append-only, segment-rotated log of buffered messages per guild/channel.
+
+    Appends are buffered in memory and written behind on a worker thread every
+    `flush_interval` seconds. Segments rotate at `segment_bytes`; once a
+    channel has logged `compact_factor` times `keep` entries, its log is
+    rewritten to only the newest `keep`. restore() rebuilds buffers at startup
+    by memory-mapping segments, reading only as far back as it needs.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        keep: int = 25,
+        segment_bytes: int = 64 * 1024,
+        compact_factor: int = 4,
+        flush_interval: float = 1.0
+    ):
+        self.directory = directory
+        self.keep = keep
+        self.segment_bytes = segment_bytes
+        self.compact_factor = compact_factor
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        # Encoded entries waiting to be written, per channel
+        self._pending: Dict[ChannelKey, List[bytes]] = {}
+        self._channels: Dict[ChannelKey, _ChannelLog] = {}
+        self._writer = BatchWriter(
+            "Message log",
+            flush_interval,
+            take=self._take_pending,
+            write=self._write_batch,
+            has_pending=lambda: bool(self._pending),
+            restore=self._restore_batch
+        )
+
+        # Metrics
+        self.appended = 0
+        self.written = 0
+        self.rotations = 0
+        self.compactions = 0
+        self.restored_channels = 0
+        self.restored_messages = 0
+        self.restore_seconds = 0.0
+
+    def _channel(self, key: ChannelKey) -> _ChannelLog:
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _ChannelLog(os.path.join(self.directory, *key))
+            if channel.segments:
+                # Start a fresh segment rather than append after a possibly torn tail from an earlier run
+                channel.active_size = self.segment_bytes
+        return channel
+
+    def append(self, guild_id: str, channel_id: str, record: MessageRecord) -> None:
+        """Queue a record to be appended to its channel's log."""
+        self._pending.setdefault((guild_id, channel_id), []).append(encode_record(record))
+        self.appended += 1
+        self._writer.schedule()
+
+    def _take_pending(self) -> Dict[ChannelKey, List[bytes]]:
+        pending = self._pending
+        self._pending = {}
+        return pending
+
+    def _restore_batch(self, batch: Dict[ChannelKey, List[bytes]]) -> None:
+        """Put back entries that failed to write, ahead of any appended since."""
+        for key, entries in batch.items():
+            self._pending[key] = entries + self._pending.get(key, [])
+
+    def _write_batch(self, batch: Dict[ChannelKey, List[bytes]]) -> None:
+        """
+        Append each channel's entries, rotating and compacting as needed (worker thread).
+
+        Channels are removed from `batch` once written, so after a failure it
+        holds only what still needs writing.
+        """
+        for key, entries in list(batch.items()):
+            channel = self._channel(key)
+            if not channel.segments or channel.active_size >= self.segment_bytes:
+                channel.segments.append(channel.segments[-1] + 1 if channel.segments else 1)
+                channel.active_size = 0
+                self.rotations += 1
+
+            data = b''.join(entries)
+            try:
+                with open(channel.segment_path(channel.segments[-1]), 'ab') as f:
+                    f.write(data)
+            except OSError:
+                # Retry in a fresh segment so a partial write stays at a segment's tail
+                channel.active_size = self.segment_bytes
+                raise
+            del batch[key]
+            channel.active_size += len(data)
+            channel.entries += len(entries)
+            self.written += len(entries)
+
+            if channel.entries >= self.keep * self.compact_factor:
+                self._compact(channel)
+
+    def _compact(self, channel: _ChannelLog) -> None:
+        """Rewrite a channel's log as one segment holding its newest `keep` records."""
+        tail = channel.read_tail(self.keep)
+        index = channel.segments[-1] + 1
+        temp_path = channel.segment_path(index) + '.tmp'
+        data = b''.join(encode_record(record) for record in tail)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, channel.segment_path(index))
+
+        for old in channel.segments:
+            try:
+                os.remove(channel.segment_path(old))
+            except FileNotFoundError:
+                pass
+        channel.segments = [index]
+        channel.active_size = len(data)
+        channel.entries = len(tail)
+        self.compactions += 1
+
+    async def flush(self) -> None:
+        """Write everything pending, one batch at a time."""
+        await self._writer.flush()
+
+    async def close(self) -> None:
+        """Flush pending appends."""
+        await self._writer.close()
+
+    def restore(self) -> Iterator[Tuple[str, str, List[MessageRecord]]]:
+        """Yield (guild_id, channel_id, newest records oldest first) for every logged channel."""
+        started = time.perf_counter()
+        for guild_id in sorted(os.listdir(self.directory)):
+            guild_path = os.path.join(self.directory, guild_id)
+            if not os.path.isdir(guild_path):
+                continue
+            for channel_id in sorted(os.listdir(guild_path)):
+                if not os.path.isdir(os.path.join(guild_path, channel_id)):
+                    continue
+                channel = self._channel((guild_id, channel_id))
+                try:
+                    records = channel.read_tail(self.keep)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Could not restore message log for {guild_id}/{channel_id}: {e}")
+                    continue
+                channel.entries = len(records)
+                self.restored_channels += 1
+                self.restored_messages += len(records)
+                yield guild_id, channel_id, records
+        self.restore_seconds = time.perf_counter() - started
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return append, rotation, compaction and restore counters."""
+        return {
+            'appended': self.appended,
+            'pending': sum(len(entries) for entries in self._pending.values()),
+            'written': self.written,
+            'rotations': self.rotations,
+            'compactions': self.compactions,
+            'write_errors': self._writer.errors,
+            'restored_channels': self.restored_channels,
+            'restored_messages': self.restored_messages,
+            'restore_seconds': self.restore_seconds,
+        }
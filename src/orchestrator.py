@@ -1,16 +1,35 @@
+import os
 import asyncio
 import time
 import logging
-from typing import List, Dict, Optional, TYPE_CHECKING
-from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Tuple, AsyncIterator, Callable, TYPE_CHECKING
+from collections import OrderedDict
 
 if TYPE_CHECKING:
     import discord
 
 from backboard_client import backboard
+from scheduler import FairScheduler
+from outbound import OutboundScheduler
+from session import session
+from message_buffer import MessageRecord, ChannelBuffer, MessageLike
+from message_log import MessageLog
+from prompts import build_user_messages_context, USER_CONTEXT_MESSAGES
+from metrics import metrics
+from tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+messages_ingested = metrics.counter(
+    'messages_ingested_total', 'Messages added to channel buffers', labels=('source',)
+)
+analysis_wait_seconds = metrics.histogram(
+    'analysis_lock_wait_seconds', 'Time spent waiting for the guild lock and a debate slot'
+)
+analyses_in_flight = metrics.gauge('analyses_in_flight', 'Analyses holding a debate slot')
+analysis_seconds = metrics.histogram('analysis_seconds', 'Time an analysis held its debate slot')
+
 class Orchestrator:
     """
     Coordinates both Discord bots and manages shared state.
@@ -21,48 +40,235 @@ class Orchestrator:
         self.optimist_bot: Optional['discord.Client'] = None
         self.pessimist_bot: Optional['discord.Client'] = None
         
-        # Message buffers: guild_id -> channel_id -> deque of message dicts
-        self.message_buffers: Dict[str, Dict[str, deque]] = {}
+        # Message buffers: guild_id -> channel_id -> ring buffer of message records
+        self.message_buffers: Dict[str, Dict[str, ChannelBuffer]] = {}
         self.buffer_size = 25
         
-        # Analysis state
-        self.analyze_lock = asyncio.Lock()
-        self.last_analyze_timestamp = 0.0
+        # Optional on-disk log the buffers are restored from after a restart
+        log_dir = os.getenv('MESSAGE_LOG_DIR')
+        self.message_log: Optional[MessageLog] = MessageLog(
+            log_dir,
+            keep=self.buffer_size,
+            segment_bytes=int(os.getenv('MESSAGE_LOG_SEGMENT_BYTES', str(64 * 1024))),
+            flush_interval=float(os.getenv('MESSAGE_LOG_FLUSH_INTERVAL', '1.0'))
+        ) if log_dir else None
+        
+        # Recently ingested Discord message IDs, for deduplication
+        self.seen_message_ids: 'OrderedDict[int, None]' = OrderedDict()
+        self.seen_message_limit = 4096
+        self.ingested_count = 0
+        self.duplicate_count = 0
+        
+        # Analysis state, per guild: guild_id -> lock / last analysis time
+        self.guild_locks: Dict[str, asyncio.Lock] = {}
+        self.last_analyze_timestamps: Dict[str, float] = {}
         self.cooldown_seconds = 60.0
         
+        # Debates running at once across all guilds, shared round-robin
+        self.max_concurrent_analyses = int(os.getenv('MAX_CONCURRENT_ANALYSES', '4'))
+        self.scheduler = FairScheduler(self.max_concurrent_analyses)
+        
+        # Minimum seconds between edits of a streamed message
+        self.stream_edit_interval = 1.0
+        
+        # Per-channel, rate-limited queue for everything the bots post
+        self.outbound = OutboundScheduler(
+            rate=int(os.getenv('OUTBOUND_RATE', '5')),
+            period=float(os.getenv('OUTBOUND_RATE_PERIOD', '5.0')),
+            coalesce_window=float(os.getenv('OUTBOUND_COALESCE_WINDOW', '1.0'))
+        )
+        
     def set_bots(self, optimist_bot: 'discord.Client', pessimist_bot: 'discord.Client') -> None:
         """Set bot references."""
         self.optimist_bot = optimist_bot
         self.pessimist_bot = pessimist_bot
     
-    def add_message(self, guild_id: str, channel_id: str, message_data: Dict[str, str]) -> None:
+    def ingest_message(self, message: 'discord.Message') -> bool:
+        """
+        Buffer a gateway message if it belongs to a tracked general channel.
+        
+        This is the single ingestion path: only one bot's gateway calls it, and
+        messages already seen (by Discord message ID) are dropped.
+        
+        Returns:
+            True if the message was buffered
+        """
+        if message.author.bot or not message.guild:
+            return False
+        
+        guild_id = str(message.guild.id)
+        channel_setup = session.get_channel_setup(guild_id)
+        if not channel_setup or str(message.channel.id) != channel_setup.general_channel_id:
+            return False
+        
+        if message.id in self.seen_message_ids:
+            self.duplicate_count += 1
+            return False
+        self._remember_message_id(message.id)
+        
+        record = MessageRecord.from_discord(message)
+        
+        logger.debug(
+            f"Buffered | Guild: {guild_id} | "
+            f"User: {record.author_name} (ID: {record.author_id}) | "
+            f"Content: {record.content[:50]}{'...' if len(record.content) > 50 else ''}"
+        )
+        
+        self.add_message(guild_id, str(message.channel.id), record)
+        self.ingested_count += 1
+        messages_ingested.inc(source='gateway')
+        return True
+    
+    def _remember_message_id(self, message_id: int) -> None:
+        """Mark a message ID as buffered, forgetting the oldest beyond the limit."""
+        self.seen_message_ids[message_id] = None
+        if len(self.seen_message_ids) > self.seen_message_limit:
+            self.seen_message_ids.popitem(last=False)
+    
+    def merge_history(self, guild_id: str, channel_id: str, records: List[MessageRecord]) -> int:
         """
-        Add a message to the buffer for a channel.
+        Merge fetched channel history into a buffer, skipping messages already buffered.
+        
+        The buffer is rebuilt in timestamp order from its current records plus
+        the new ones, keeping the newest buffer_size.
+        
+        Returns:
+            Number of new messages kept in the buffer (older ones trimmed by
+            buffer_size are not counted, logged or remembered)
+        """
+        buffer = self._buffer_for(guild_id, channel_id)
+        buffered_ids = {record.message_id for record in buffer}
+        new_records = [
+            record for record in records
+            if record.message_id not in buffered_ids and record.message_id not in self.seen_message_ids
+        ]
+        if not new_records:
+            return 0
+        
+        merged = sorted(buffer.records() + new_records, key=lambda record: record.timestamp_ms)
+        kept = merged[-self.buffer_size:]
+        rebuilt = ChannelBuffer(self.buffer_size)
+        for record in kept:
+            rebuilt.append(record)
+        self.message_buffers[guild_id][channel_id] = rebuilt
+        
+        new_ids = {record.message_id for record in new_records}
+        retained = [record for record in kept if record.message_id in new_ids]
+        for record in retained:
+            self._remember_message_id(record.message_id)
+            if self.message_log:
+                self.message_log.append(guild_id, channel_id, record)
+        if retained:
+            messages_ingested.inc(len(retained), source='history')
+        return len(retained)
+    
+    def get_ingest_stats(self) -> Dict[str, int]:
+        """Return counts of ingested and dropped-duplicate messages."""
+        return {
+            'ingested': self.ingested_count,
+            'dropped_duplicates': self.duplicate_count,
+        }
+    
+    def add_message(self, guild_id: str, channel_id: str, message_data: MessageLike) -> None:
+        """
+        Add a message to the buffer for a channel (and to the message log, if enabled).
         
         Args:
             guild_id: Discord guild ID
             channel_id: Discord channel ID
-            message_data: Dict containing 'content', 'author_name', 'author_id', 'timestamp'
+            message_data: MessageRecord, or dict containing 'content', 'author_name', 'author_id', 'timestamp'
         """
+        record = message_data if isinstance(message_data, MessageRecord) else MessageRecord.from_dict(message_data)
+        self._buffer_for(guild_id, channel_id).append(record)
+        
+        if self.message_log:
+            self.message_log.append(guild_id, channel_id, record)
+    
+    def _buffer_for(self, guild_id: str, channel_id: str) -> ChannelBuffer:
+        """Get a channel's ring buffer, creating it if needed."""
         if guild_id not in self.message_buffers:
             self.message_buffers[guild_id] = {}
         
         if channel_id not in self.message_buffers[guild_id]:
-            self.message_buffers[guild_id][channel_id] = deque(maxlen=self.buffer_size)
+            self.message_buffers[guild_id][channel_id] = ChannelBuffer(self.buffer_size)
+        
+        return self.message_buffers[guild_id][channel_id]
+    
+    def restore_buffers(self) -> int:
+        """
+        Refill buffers from the message log after a restart.
+        
+        Returns:
+            Number of messages restored
+        """
+        if not self.message_log:
+            return 0
+        
+        restored = 0
+        for guild_id, channel_id, records in self.message_log.restore():
+            buffer = self._buffer_for(guild_id, channel_id)
+            for record in records:
+                buffer.append(record)
+                # Let ingestion drop these if Discord redelivers them
+                self._remember_message_id(record.message_id)
+            restored += len(records)
         
-        self.message_buffers[guild_id][channel_id].append(message_data)
+        stats = self.message_log.get_stats()
+        logger.info(
+            f"Restored {restored} messages in {stats['restored_channels']} channels "
+            f"from message log in {stats['restore_seconds'] * 1000:.1f}ms"
+        )
+        return restored
+    
+    async def close(self) -> None:
+        """Flush the message log."""
+        if self.message_log:
+            await self.message_log.close()
+    
+    def get_buffer(self, guild_id: str, channel_id: str) -> Optional[ChannelBuffer]:
+        """Get the ring buffer for a channel, if one exists."""
+        return self.message_buffers.get(guild_id, {}).get(channel_id)
     
     def get_messages(self, guild_id: str, channel_id: str) -> List[Dict[str, str]]:
         """
         Get buffered messages for a channel.
         
         Returns:
-            List of message dicts with 'content', 'author_name', 'author_id', 'timestamp'
+            List of message dicts with 'content', 'author_name', 'author_id', 'timestamp', 'message_id'
+        """
+        buffer = self.get_buffer(guild_id, channel_id)
+        return buffer.to_dicts() if buffer else []
+    
+    def get_message_count(self, guild_id: str, channel_id: str) -> int:
+        """Count buffered messages for a channel without copying them."""
+        buffer = self.get_buffer(guild_id, channel_id)
+        return len(buffer) if buffer else 0
+    
+    def get_formatted_messages(self, guild_id: str, channel_id: str) -> str:
+        """
+        Get a channel's buffered messages formatted for AI consumption.
+        
+        Same output as format_messages_for_ai(get_messages(...)), but served from
+        the buffer's incrementally maintained transcript.
+        """
+        buffer = self.get_buffer(guild_id, channel_id)
+        return buffer.render_transcript() if buffer else ""
+    
+    def get_user_context(self, guild_id: str, channel_id: str, username: str) -> str:
+        """
+        Get the debate context for a target user, memoized against the buffer version.
+        
+        Same output as prompts.get_user_messages_context(get_messages(...), username).
         """
-        if guild_id in self.message_buffers:
-            if channel_id in self.message_buffers[guild_id]:
-                return list(self.message_buffers[guild_id][channel_id])
-        return []
+        buffer = self.get_buffer(guild_id, channel_id)
+        if not buffer:
+            return build_user_messages_context("", username)
+        return buffer.memoize(
+            f"user_context:{username}",
+            lambda: build_user_messages_context(
+                buffer.render_transcript(last=USER_CONTEXT_MESSAGES), username
+            )
+        )
     
     def format_messages_for_ai(self, messages: List[Dict[str, str]], target_user_id: Optional[str] = None) -> str:
         """
@@ -101,28 +307,75 @@ class Orchestrator:
         Returns:
             List of message dicts from that user only
         """
-        all_messages = self.get_messages(guild_id, channel_id)
-        return [msg for msg in all_messages if msg.get('author_id') == user_id]
+        buffer = self.get_buffer(guild_id, channel_id)
+        if not buffer:
+            return []
+        return [record.to_dict() for record in buffer.records_by_author(int(user_id))]
     
     def get_user_message_count(self, guild_id: str, channel_id: str, user_id: str) -> int:
         """Count how many messages a specific user has in the buffer."""
-        return len(self.get_messages_by_user(guild_id, channel_id, user_id))
+        buffer = self.get_buffer(guild_id, channel_id)
+        return buffer.count_by_author(int(user_id)) if buffer else 0
     
-    def can_analyze(self) -> bool:
-        """Check if enough time has passed since last analysis."""
+    def get_top_talkers(self, guild_id: str, channel_id: str, limit: int = 5) -> List[Tuple[str, str, int]]:
+        """
+        Get the most active users in a channel's buffer.
+        
+        Returns:
+            List of (user_id, author_name, message_count), most active first
+        """
+        buffer = self.get_buffer(guild_id, channel_id)
+        if not buffer:
+            return []
+        
+        talkers = []
+        for author_id, count in buffer.top_authors(limit):
+            latest = buffer.records_by_author(author_id)[-1]
+            talkers.append((str(author_id), latest.author_name, count))
+        return talkers
+    
+    def get_guild_lock(self, guild_id: str) -> asyncio.Lock:
+        """Get the analysis lock for a guild."""
+        lock = self.guild_locks.get(guild_id)
+        if lock is None:
+            lock = self.guild_locks[guild_id] = asyncio.Lock()
+        return lock
+    
+    def is_analyzing(self, guild_id: str) -> bool:
+        """Check if an analysis is running (or waiting for a slot) in a guild."""
+        lock = self.guild_locks.get(guild_id)
+        return lock is not None and lock.locked()
+    
+    @asynccontextmanager
+    async def analysis_slot(self, guild_id: str) -> AsyncIterator[None]:
+        """
+        Hold a guild's analysis lock plus one of the global debate slots.
+        
+        Guilds wait for slots round-robin, so a busy guild cannot starve quiet ones.
+        """
+        started = time.perf_counter()
+        async with self.get_guild_lock(guild_id):
+            async with self.scheduler.slot(guild_id):
+                analysis_wait_seconds.observe(time.perf_counter() - started)
+                tracer.record('analysis.wait_for_slot', started, guild_id=guild_id)
+                with analyses_in_flight.track(), analysis_seconds.time():
+                    yield
+    
+    def can_analyze(self, guild_id: str) -> bool:
+        """Check if enough time has passed since the guild's last analysis."""
         current_time = time.time()
-        return (current_time - self.last_analyze_timestamp) >= self.cooldown_seconds
+        return (current_time - self.last_analyze_timestamps.get(guild_id, 0.0)) >= self.cooldown_seconds
     
-    def time_until_ready(self) -> float:
-        """Return seconds until next analysis is allowed."""
+    def time_until_ready(self, guild_id: str) -> float:
+        """Return seconds until the guild's next analysis is allowed."""
         current_time = time.time()
-        elapsed = current_time - self.last_analyze_timestamp
+        elapsed = current_time - self.last_analyze_timestamps.get(guild_id, 0.0)
         remaining = self.cooldown_seconds - elapsed
         return max(0.0, remaining)
     
-    def update_analyze_timestamp(self) -> None:
-        """Update the last analysis timestamp to now."""
-        self.last_analyze_timestamp = time.time()
+    def update_analyze_timestamp(self, guild_id: str) -> None:
+        """Update the guild's last analysis timestamp to now."""
+        self.last_analyze_timestamps[guild_id] = time.time()
     
     async def run_debate(
         self,
@@ -146,7 +399,7 @@ class Orchestrator:
             pessimist_assistant_id: Backboard assistant ID for Pessimist
             debate_channel: Discord channel to post debate
         """
-        async with self.analyze_lock:
+        async with self.analysis_slot(guild_id):
             # Get buffered messages
             messages = self.get_messages(guild_id, channel_id)
             
@@ -155,7 +408,7 @@ class Orchestrator:
                 return
             
             # Format messages for AI
-            formatted_context = self.format_messages_for_ai(messages, target_user_id)
+            formatted_context = self.get_formatted_messages(guild_id, channel_id)
             
             # Count target user's messages
             user_message_count = self.get_user_message_count(guild_id, channel_id, target_user_id)
@@ -206,7 +459,7 @@ Provide your analysis following your assigned perspective."""
                     await self.post_as_pessimist(debate_channel, pessimist_response.strip())
                 
                 # Update timestamp
-                self.update_analyze_timestamp()
+                self.update_analyze_timestamp(guild_id)
                 
                 logger.info(f"Debate completed for {target_username}")
                 
@@ -214,31 +467,175 @@ Provide your analysis following your assigned perspective."""
                 logger.error(f"Error during debate: {e}")
                 await debate_channel.send(f"⚠️ Analysis error: {str(e)}")
     
+    def _resolve_channel(
+        self,
+        bot: Optional['discord.Client'],
+        bot_name: str,
+        channel: 'discord.TextChannel'
+    ) -> Optional['discord.TextChannel']:
+        """Get a channel from one bot's perspective, or None if it can't post there."""
+        if not bot:
+            logger.error(f"{bot_name} bot not set")
+            return None
+        
+        target = bot.get_channel(channel.id)
+        if not target or not hasattr(target, 'send'):
+            logger.error(f"{bot_name} bot cannot access channel {channel.id}")
+            return None
+        return target
+    
+    def queue_as_optimist(
+        self,
+        channel: 'discord.TextChannel',
+        content: str,
+        coalesce: bool = True
+    ) -> Optional[asyncio.Future]:
+        """
+        Queue a message from the Optimist bot without waiting for it to be sent.
+        
+        Returns a future for the sent message; use coalesce=False for messages that will be edited.
+        """
+        target = self._resolve_channel(self.optimist_bot, "Optimist", channel)
+        return self.outbound.submit(target, "Optimist", content, coalesce) if target else None
+    
+    def queue_as_pessimist(
+        self,
+        channel: 'discord.TextChannel',
+        content: str,
+        coalesce: bool = True
+    ) -> Optional[asyncio.Future]:
+        """
+        Queue a message from the Pessimist bot without waiting for it to be sent.
+        
+        Returns a future for the sent message; use coalesce=False for messages that will be edited.
+        """
+        target = self._resolve_channel(self.pessimist_bot, "Pessimist", channel)
+        return self.outbound.submit(target, "Pessimist", content, coalesce) if target else None
+    
     async def post_as_optimist(self, channel: 'discord.TextChannel', content: str) -> None:
         """Post a message using the Optimist bot."""
-        if not self.optimist_bot:
-            logger.error("Optimist bot not set")
-            return
-        
-        # Get the channel from optimist bot's perspective
-        optimist_channel = self.optimist_bot.get_channel(channel.id)
-        if optimist_channel and hasattr(optimist_channel, 'send'):
-            await optimist_channel.send(content)
-        else:
-            logger.error(f"Optimist bot cannot access channel {channel.id}")
+        future = self.queue_as_optimist(channel, content)
+        if future:
+            await future
     
     async def post_as_pessimist(self, channel: 'discord.TextChannel', content: str) -> None:
         """Post a message using the Pessimist bot."""
-        if not self.pessimist_bot:
-            logger.error("Pessimist bot not set")
-            return
-        
-        # Get the channel from pessimist bot's perspective
-        pessimist_channel = self.pessimist_bot.get_channel(channel.id)
-        if pessimist_channel and hasattr(pessimist_channel, 'send'):
-            await pessimist_channel.send(content)
+        future = self.queue_as_pessimist(channel, content)
+        if future:
+            await future
+    
+    async def stream_as_optimist(
+        self,
+        channel: 'discord.TextChannel',
+        chunks: AsyncIterator[str],
+        render: Callable[[str], str],
+        finalize: Optional[Callable[[str], str]] = None,
+        placeholder: Optional['discord.Message'] = None
+    ) -> str:
+        """Stream text into a message posted (or a placeholder already posted) by the Optimist bot. Returns the full text."""
+        return await self._stream_to_channel(
+            self.optimist_bot, "Optimist", channel, chunks, render, finalize, placeholder
+        )
+    
+    async def stream_as_pessimist(
+        self,
+        channel: 'discord.TextChannel',
+        chunks: AsyncIterator[str],
+        render: Callable[[str], str],
+        finalize: Optional[Callable[[str], str]] = None,
+        placeholder: Optional['discord.Message'] = None
+    ) -> str:
+        """Stream text into a message posted (or a placeholder already posted) by the Pessimist bot. Returns the full text."""
+        return await self._stream_to_channel(
+            self.pessimist_bot, "Pessimist", channel, chunks, render, finalize, placeholder
+        )
+    
+    async def _stream_to_channel(
+        self,
+        bot: Optional['discord.Client'],
+        bot_name: str,
+        channel: 'discord.TextChannel',
+        chunks: AsyncIterator[str],
+        render: Callable[[str], str],
+        finalize: Optional[Callable[[str], str]],
+        placeholder: Optional['discord.Message'] = None
+    ) -> str:
+        """
+        Post the first visible text as soon as it arrives, then edit the message as more streams in.
+        
+        Edits share the bot's rate limit with its queued posts. If the stream
+        fails or is cancelled, a message this call posted is deleted rather
+        than left showing partial text; a placeholder is left for the caller
+        to replace.
+        
+        Args:
+            bot: Bot account to post with
+            bot_name: Name used in log messages
+            channel: Channel to post in
+            chunks: Async iterator of text deltas
+            render: Maps the partial text to message content
+            finalize: Maps the complete text to the final message content (defaults to render)
+            placeholder: Message already posted by this bot to edit instead of sending a new one
+            
+        Returns:
+            The complete streamed text
+        """
+        target = self._resolve_channel(bot, bot_name, channel)
+        
+        text = ""
+        message = placeholder
+        shown = placeholder.content if placeholder else ""
+        last_edit = 0.0
+        
+        try:
+            async for chunk in chunks:
+                text += chunk
+                if target is None:
+                    continue
+                
+                content = render(text)[:1900]
+                if not content.strip() or content == shown:
+                    continue
+                
+                now = time.monotonic()
+                if message is None:
+                    # Queued behind earlier posts; never merged, since it gets edited
+                    message = await self.outbound.send(target, bot_name, content, coalesce=False)
+                    shown = content
+                    last_edit = now
+                elif now - last_edit >= self.stream_edit_interval:
+                    with tracer.span('discord.edit', bot=bot_name):
+                        await self.outbound.edit(message, bot_name, content)
+                    shown = content
+                    last_edit = now
+        except BaseException:
+            if message is not None and message is not placeholder:
+                try:
+                    await message.delete()
+                except Exception as e:
+                    logger.warning(f"Could not delete partial {bot_name} message: {e}")
+            raise
+        
+        if target is None:
+            return text
+        
+        final_content = (finalize or render)(text)
+        if not final_content.strip():
+            return text
+        
+        # Replace the partial view with the final rendering, spilling overflow into new messages
+        final_chunks = self.split_message(final_content)
+        if message is None:
+            for part in final_chunks:
+                await self.outbound.send(target, bot_name, part)
         else:
-            logger.error(f"Pessimist bot cannot access channel {channel.id}")
+            if final_chunks[0] != shown:
+                with tracer.span('discord.edit', bot=bot_name):
+                    await self.outbound.edit(message, bot_name, final_chunks[0])
+            for part in final_chunks[1:]:
+                await self.outbound.send(target, bot_name, part)
+        
+        return text
     
     def split_message(self, content: str, max_length: int = 1900) -> List[str]:
         """Split a message into chunks under Discord's limit."""
@@ -0,0 +1,332 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import discord
+
+from metrics import metrics
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+post_seconds = metrics.histogram(
+    'discord_post_seconds', 'Time from queueing a Discord post until it was sent', labels=('bot',)
+)
+send_seconds = metrics.histogram(
+    'discord_send_seconds', 'Discord API time to send one (possibly coalesced) message', labels=('bot',)
+)
+
+# Whoever is queueing posts in this context (see OutboundScheduler.owned_by)
+_owner: ContextVar[Optional[object]] = ContextVar('outbound_owner', default=None)
+
+
+class _Post:
+    """One queued outbound message."""
+
+    __slots__ = ('target', 'sender', 'content', 'coalesce', 'future', 'enqueued_at', 'span', 'owner')
+
+    def __init__(self, target: 'discord.abc.Messageable', sender: str, content: str, coalesce: bool):
+        self.target = target
+        self.sender = sender
+        self.content = content
+        self.coalesce = coalesce
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        # Span of the analysis that queued it, if traced
+        self.span = tracer.current()
+        # Analysis that queued it, so it can drain or cancel only its own posts
+        self.owner = _owner.get()
+
+
+class _TokenBucket:
+    """Allows `rate` sends per `period` seconds, waiting when empty."""
+
+    __slots__ = ('rate', 'period', 'tokens', 'updated_at')
+
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated_at = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate / self.period)
+        self.updated_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.period / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class OutboundScheduler:
+    """
+    Per-channel queue for outgoing Discord messages.
+
+    Posts to a channel are sent strictly in submission order by one worker
+    per channel. Each bot account gets its own token bucket per channel
+    (Discord allows roughly 5 messages per 5 seconds), so a burst waits in
+    the queue instead of running into 429s. Consecutive queued posts from the
+    same bot and owner, submitted within `coalesce_window` seconds of each
+    other, are merged into one message when they fit.
+
+    Several analyses can post to the same channel at once; posts queued
+    inside owned_by() are tagged with their owner, so one analysis waiting
+    for or cancelling its posts leaves the others' alone.
+    """
+
+    def __init__(
+        self,
+        rate: int = 5,
+        period: float = 5.0,
+        coalesce_window: float = 1.0,
+        max_length: int = 1900
+    ):
+        self.rate = rate
+        self.period = period
+        self.coalesce_window = coalesce_window
+        self.max_length = max_length
+
+        self._queues: Dict[int, Deque[_Post]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        # Posts taken off a channel's queue and being sent
+        self._sending: Dict[int, List[_Post]] = {}
+        self._buckets: Dict[Tuple[str, int], _TokenBucket] = {}
+
+        # Metrics
+        self.submitted = 0
+        self.sent = 0
+        self.edited = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.throttled_seconds = 0.0
+        self.delivered = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def submit(
+        self,
+        target: 'discord.abc.Messageable',
+        sender: str,
+        content: str,
+        coalesce: bool = True
+    ) -> asyncio.Future:
+        """
+        Queue a message without waiting for it.
+
+        Returns a future for the sent discord.Message (None if sending failed).
+        Pass coalesce=False for messages that will be edited afterwards.
+        """
+        post = _Post(target, sender, content, coalesce)
+        channel_id = target.id
+        self._queues.setdefault(channel_id, deque()).append(post)
+        self.submitted += 1
+
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = asyncio.create_task(self._run(channel_id))
+        return post.future
+
+    async def send(
+        self,
+        target: 'discord.abc.Messageable',
+        sender: str,
+        content: str,
+        coalesce: bool = True
+    ) -> Optional['discord.Message']:
+        """Queue a message and wait until it has been sent."""
+        return await self.submit(target, sender, content, coalesce)
+
+    @contextmanager
+    def owned_by(self, owner: object) -> Iterator[object]:
+        """Tag posts queued in this context (and tasks started from it) as `owner`'s."""
+        token = _owner.set(owner)
+        try:
+            yield owner
+        finally:
+            _owner.reset(token)
+
+    def _bucket(self, sender: str, channel_id: int) -> _TokenBucket:
+        bucket = self._buckets.get((sender, channel_id))
+        if bucket is None:
+            bucket = self._buckets[(sender, channel_id)] = _TokenBucket(self.rate, self.period)
+        return bucket
+
+    async def edit(self, message: 'discord.Message', sender: str, content: str) -> None:
+        """Edit a message sent by `sender`, waiting for a token from its bucket in that channel."""
+        bucket = self._bucket(sender, message.channel.id)
+        delay = bucket.delay()
+        while delay:
+            self.throttled_seconds += delay
+            await asyncio.sleep(delay)
+            delay = bucket.delay()
+        bucket.take()
+        await message.edit(content=content)
+        self.edited += 1
+
+    def _take_batch(self, queue: Deque[_Post]) -> List[_Post]:
+        """Pop the next post plus any queued posts it can absorb."""
+        batch = [queue.popleft()]
+        first = batch[0]
+        if not first.coalesce:
+            return batch
+
+        length = len(first.content)
+        while queue:
+            post = queue[0]
+            if (
+                not post.coalesce
+                or post.sender != first.sender
+                or post.owner is not first.owner
+                or post.enqueued_at - batch[-1].enqueued_at > self.coalesce_window
+                or length + 1 + len(post.content) > self.max_length
+            ):
+                break
+            length += 1 + len(post.content)
+            batch.append(queue.popleft())
+        return batch
+
+    async def _run(self, channel_id: int) -> None:
+        """Send a channel's queue in order, then exit."""
+        queue = self._queues[channel_id]
+        while queue:
+            bucket = self._bucket(queue[0].sender, channel_id)
+
+            # Posts keep arriving while we wait, so more of them can be coalesced
+            delay = bucket.delay()
+            if delay:
+                self.throttled_seconds += delay
+                await asyncio.sleep(delay)
+                continue
+
+            batch = self._take_batch(queue)
+            self._sending[channel_id] = batch
+            bucket.take()
+
+            now = time.monotonic()
+            self.delivered += len(batch)
+            for post in batch:
+                latency = now - post.enqueued_at
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+            message = None
+            send_started = time.perf_counter()
+            try:
+                with send_seconds.time(bot=batch[0].sender):
+                    message = await batch[0].target.send("\n".join(post.content for post in batch))
+                self.sent += 1
+                self.coalesced += len(batch) - 1
+                sent_at = time.monotonic()
+                for post in batch:
+                    post_seconds.observe(sent_at - post.enqueued_at, bot=post.sender)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{batch[0].sender} post to channel {channel_id} failed: {e}")
+
+            if batch[0].span is not None:
+                tracer.record(
+                    'discord.post', send_started, parent=batch[0].span, bot=batch[0].sender,
+                    posts=len(batch), queued_ms=round(1000 * (now - batch[0].enqueued_at), 1),
+                    sent=message is not None
+                )
+            for post in batch:
+                if not post.future.done():
+                    post.future.set_result(message)
+            self._sending.pop(channel_id, None)
+
+        self._workers.pop(channel_id, None)
+        if not queue:
+            self._queues.pop(channel_id, None)
+
+    async def drain(self, channel_id: int) -> None:
+        """Wait until the current owner's posts queued for a channel have been sent."""
+        owner = _owner.get()
+        posts = self._sending.get(channel_id, []) + list(self._queues.get(channel_id, ()))
+        await asyncio.gather(
+            *(post.future for post in posts if post.owner is owner),
+            return_exceptions=True
+        )
+
+    def cancel(self, channel_id: int) -> None:
+        """Drop the current owner's posts still queued for a channel (their futures resolve to None)."""
+        owner = _owner.get()
+        queue = self._queues.get(channel_id)
+        if not queue:
+            return
+        kept = [post for post in queue if post.owner is not owner]
+        for post in queue:
+            if post.owner is owner:
+                self.dropped += 1
+                if not post.future.done():
+                    post.future.set_result(None)
+        # The channel's worker holds this deque, so update it in place
+        queue.clear()
+        queue.extend(kept)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return queue depth, send/coalesce counts and queue latency."""
+        return {
+            'queued': self.queued,
+            'channels': len(self._workers),
+            'submitted': self.submitted,
+            'sent': self.sent,
+            'edited': self.edited,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'throttled_seconds': self.throttled_seconds,
+            'average_latency_ms': 1000 * self.total_latency / self.delivered if self.delivered else 0.0,
+            'max_latency_ms': 1000 * self.max_latency,
+        }
+
+    @property
+    def queued(self) -> int:
+        """Posts waiting to be sent, across all channels."""
+        return sum(len(queue) for queue in self._queues.values())
+
+
+class ProgressMessage:
+    """
+    One status message for an interaction that is edited as progress is made.
+
+    The first update sends a followup; later ones edit it with the new line
+    appended instead of posting another message.
+    """
+
+    def __init__(self, interaction: 'discord.Interaction', max_length: int = 1900):
+        self.interaction = interaction
+        self.max_length = max_length
+        self.lines: List[str] = []
+        self.message: Optional['discord.WebhookMessage'] = None
+        self._lock = asyncio.Lock()
+
+    async def update(self, line: str, **kwargs: Any) -> None:
+        """Append a line to the status message."""
+        async with self._lock:
+            self.lines.append(line)
+            content = "\n".join(self.lines)
+            if len(content) > self.max_length:
+                content = content[-self.max_length:]
+
+            if self.message is not None:
+                try:
+                    with tracer.span('discord.progress_edit'):
+                        await self.message.edit(content=content)
+                    return
+                except Exception as e:
+                    logger.warning(f"Could not edit progress message, sending a new one: {e}")
+                    self.lines = [line]
+                    content = line
+
+            with tracer.span('discord.progress_send'):
+                self.message = await self.interaction.followup.send(content, wait=True, **kwargs)
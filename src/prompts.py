@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Any, List, Dict
 
 
 def get_setup_prompt(perspective: str, username: str) -> str:
@@ -68,6 +68,96 @@ Now provide exactly 1 pieces of advice in this format and in like 5 words max:
 Each piece should be specific, actionable, and based on the debate. Keep it PG and respectful."""
 
 
+
+# Labels for the fast debate's structured response
+FAST_LINE_LABELS = {"OPTIMIST": "optimist", "PESSIMIST": "pessimist"}
+FAST_ADVICE_LABELS = {"OPTIMIST ADVICE": "optimist", "PESSIMIST ADVICE": "pessimist"}
+
+
+def get_fast_debate_prompt(username: str, context: str, turns: int) -> str:
+    """Generate one prompt asking for the whole debate and both sides' advice."""
+    return f"""Write a complete debate about {username}'s Discord messages between two characters.
+
+The Optimist:
+{get_setup_prompt("optimist", username)}
+The Pessimist:
+{get_setup_prompt("pessimist", username)}
+{context}
+
+Write exactly {turns} debate lines, alternating and starting with the Optimist, then one piece of advice from each side.
+Reply in EXACTLY this format with nothing else, one line each:
+
+OPTIMIST: [point in maximum 18 words]
+PESSIMIST: [point in maximum 18 words]
+...
+OPTIMIST ADVICE: [one specific, actionable piece of advice]
+PESSIMIST ADVICE: [one piece of advice in like 5 words max]
+
+Be direct and specific. Reference the user's actual messages. Keep advice PG and respectful."""
+
+
+def parse_fast_debate(response: str, turns: int) -> Dict[str, Any]:
+    """
+    Split a fast debate response into its debate lines and advice.
+    
+    Returns a dict with 'debate_lines' (alternating, Optimist first; a side's
+    missing lines become "[No response]") plus 'optimist_advice' and
+    'pessimist_advice' ("" when missing).
+    """
+    said: Dict[str, List[str]] = {"optimist": [], "pessimist": []}
+    advice = {"optimist": "", "pessimist": ""}
+    
+    for raw in response.splitlines():
+        # Tolerate list markers and bold around the label
+        line = raw.strip().lstrip("-*#0123456789.) ").replace("**", "")
+        label, sep, text = line.partition(":")
+        if not sep or not text.strip():
+            continue
+        label = label.strip().upper()
+        if label in FAST_ADVICE_LABELS:
+            advice[FAST_ADVICE_LABELS[label]] = text.strip()
+        elif label in FAST_LINE_LABELS:
+            said[FAST_LINE_LABELS[label]].append(text.strip())
+    
+    debate_lines = []
+    for turn in range(turns):
+        side = said["optimist" if turn % 2 == 0 else "pessimist"]
+        index = turn // 2
+        debate_lines.append(side[index] if index < len(side) else "[No response]")
+    
+    return {
+        "debate_lines": debate_lines,
+        "optimist_advice": advice["optimist"],
+        "pessimist_advice": advice["pessimist"]
+    }
+
+# How many of the most recent messages go into a player's debate context
+USER_CONTEXT_MESSAGES = 25
+
+
+def format_message_line(author_name: str, author_id: str, content: str) -> str:
+    """Format one message with clear user attribution: [User: name (ID: id)]: message"""
+    return f"[User: {author_name} (ID: {author_id})]: {content}"
+
+
+def build_user_messages_context(transcript: str, username: str) -> str:
+    """
+    Wrap an already formatted transcript (one format_message_line per line) as user context.
+    
+    Args:
+        transcript: Newline-joined formatted message lines
+        username: The target username being analyzed
+    """
+    if not transcript:
+        return "No recent messages to analyze."
+    
+    return (
+        f"Recent Discord conversation (analyzing {username}):\n\n"
+        f"{transcript}\n"
+        f"\n(Focus your analysis on {username}'s messages and their interactions)"
+    )
+
+
 def get_user_messages_context(messages: List[Dict[str, str]], username: str) -> str:
     """
     Format user's Discord messages for context.
@@ -79,20 +169,13 @@ def get_user_messages_context(messages: List[Dict[str, str]], username: str) ->
     Returns:
         Formatted string showing the conversation with clear user attribution
     """
-    if not messages:
-        return f"No recent messages to analyze."
-    
     # Format as conversation with user attribution
-    formatted = f"Recent Discord conversation (analyzing {username}):\n\n"
-    
-    for msg in messages[-25:]:  # Last 25 messages
-        author_name = msg.get('author_name', 'Unknown')
-        author_id = msg.get('author_id', '000000')
-        content = msg.get('content', '')
-        
-        # Format: [User: name (ID: id)]: message
-        formatted += f"[User: {author_name} (ID: {author_id})]: {content}\n"
-    
-    formatted += f"\n(Focus your analysis on {username}'s messages and their interactions)"
-    
-    return formatted
\ No newline at end of file
+    transcript = "\n".join(
+        format_message_line(
+            msg.get('author_name', 'Unknown'),
+            msg.get('author_id', '000000'),
+            msg.get('content', '')
+        )
+        for msg in messages[-USER_CONTEXT_MESSAGES:]
+    )
+    return build_user_messages_context(transcript, username)
@@ -0,0 +1,205 @@
+import random
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, FrozenSet, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is short-circuited because the breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, retry in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Jittered exponential backoff for transient failures.
+
+    Backboard requests are not idempotent (each one appends to a thread and
+    may run the LLM), so only statuses meaning the request was not processed
+    are retried by default: 425, 429 and 503. Any response carrying a
+    Retry-After header is retried as well.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    # Longest Retry-After we are willing to sleep for before giving up
+    max_retry_after: float = 30.0
+    retry_statuses: FrozenSet[int] = field(
+        default_factory=lambda: frozenset({425, 429, 503})
+    )
+
+    def should_retry_status(self, status: int, retry_after: Optional[float] = None) -> bool:
+        """Check if a response is worth retrying (its status, or the server asked us to)."""
+        return status in self.retry_statuses or (retry_after is not None and status >= 400)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+            retry_after: Server-provided Retry-After delay, if any
+
+        Returns:
+            Delay in seconds, or None if the server asked us to wait too long
+        """
+        # Full jitter spreads retries from concurrent debates apart
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker.
+
+    Closed: calls pass and outcomes are recorded over a sliding window.
+    Open: calls fail fast until open_seconds have passed.
+    Half-open: a single probe call is let through; success closes the
+    breaker, failure opens it again. Only the probe's outcome counts there:
+    calls that started before the breaker opened don't close or re-open it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 15.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Sliding window of (monotonic time, succeeded)
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+        # Counters
+        self.trips = 0
+        self.short_circuits = 0
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError if the call must not go through.
+
+        Returns True if this call is the half-open probe; pass that to the
+        record_* call for its outcome.
+        """
+        if self.state == self.CLOSED:
+            return False
+
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            remaining = self.open_seconds - (now - self.opened_at)
+            if remaining > 0:
+                self.short_circuits += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = self.HALF_OPEN
+            logger.info(f"{self.name} circuit half-open, probing")
+
+        # Half-open: only one probe at a time
+        if self._probe_in_flight:
+            self.short_circuits += 1
+            raise CircuitOpenError(self.name, self.open_seconds)
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, probe: bool = False) -> None:
+        """Record a call that reached a healthy server."""
+        if probe:
+            logger.info(f"{self.name} circuit closed")
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+            self._outcomes.clear()
+        elif self.state != self.CLOSED:
+            # Started before the breaker opened; says nothing about recovery
+            return
+        self._record(True)
+
+    def record_failure(self, probe: bool = False) -> None:
+        """Record a call that failed for a server-side or transport reason."""
+        if probe:
+            self._trip()
+            return
+        if self.state != self.CLOSED:
+            return
+
+        self._record(False)
+
+        calls = len(self._outcomes)
+        if calls >= self.min_calls:
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if failures / calls >= self.failure_threshold:
+                self._trip()
+
+    def record_abandoned(self, probe: bool = False) -> None:
+        """Release a half-open probe whose outcome was never observed (e.g. cancelled)."""
+        if probe:
+            self._probe_in_flight = False
+
+    def _record(self, succeeded: bool) -> None:
+        """Append an outcome and drop those that fell out of the window."""
+        now = time.monotonic()
+        self._outcomes.append((now, succeeded))
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _trip(self) -> None:
+        """Open the breaker."""
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        self.trips += 1
+        logger.warning(f"{self.name} circuit opened for {self.open_seconds}s")
+
+    def get_stats(self) -> Dict[str, object]:
+        """Return breaker state and counters."""
+        return {
+            'state': self.state,
+            'trips': self.trips,
+            'short_circuits': self.short_circuits,
+        }
@@ -0,0 +1,78 @@
+import time
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Size- and TTL-bounded LRU cache of LLM responses.
+
+    Keys are derived from the prompt content and model settings only, so the
+    cache must only be used for prompts that don't depend on thread state.
+    The turn-by-turn debate and its advice depend on thread history and are
+    never cached; only self-contained prompts (fast mode) are.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (expires at monotonic time, response)
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def make_key(content: str, model: str, provider: str, memory: str, web_search: str = "off") -> str:
+        """Build a cache key from everything that shapes the response."""
+        material = json.dumps([content, model, provider, memory, web_search], ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response, evicting the least recently used entries if full."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters."""
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'bypasses': self.bypasses,
+        }
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class FairScheduler:
+    """
+    Global concurrency limit shared fairly between keys (guilds).
+
+    When all slots are busy, waiters are queued per key and freed slots are
+    handed out round-robin across keys, so one busy guild cannot starve the
+    others no matter how many requests it has waiting.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.active = 0
+
+        # key -> FIFO of waiting futures; dict order is the round-robin order
+        self._waiters: 'OrderedDict[str, Deque[asyncio.Future]]' = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers waiting for a slot."""
+        return sum(len(queue) for queue in self._waiters.values())
+
+    def waiting_for(self, key: str) -> int:
+        """Number of callers waiting for a slot under one key."""
+        return len(self._waiters.get(key, ()))
+
+    async def acquire(self, key: str) -> None:
+        """Wait for a slot."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled; pass it on
+                self.release()
+            else:
+                self._remove_waiter(key, future)
+            raise
+
+    def release(self) -> None:
+        """Free a slot and hand it to the next guild in round-robin order."""
+        self.active -= 1
+        while self._waiters and self.active < self.limit:
+            key, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+
+            # Rotate this key to the back so other guilds go next
+            del self._waiters[key]
+            if queue:
+                self._waiters[key] = queue
+
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    def _remove_waiter(self, key: str, future: asyncio.Future) -> None:
+        """Drop a cancelled waiter from its queue."""
+        queue = self._waiters.get(key)
+        if not queue:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiters[key]
+
+    @asynccontextmanager
+    async def slot(self, key: str) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return active and waiting counts."""
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': self.waiting,
+            'waiting_guilds': len(self._waiters),
+        }
@@ -1,7 +1,10 @@
-from typing import Dict, Optional
-from dataclasses import dataclass, field
+import asyncio
+from typing import Dict, Optional, Set, Type, TypeVar
+from dataclasses import dataclass, field, fields, asdict
 from typing import List, Dict, Any
 
+from session_store import SessionStore, create_session_store
+
 
 @dataclass
 class UserSession:
@@ -20,22 +23,70 @@ class ChannelSetup:
     general_channel_id: str
     player1_room_id: str
     player2_room_id: str
+    # "turns": one LLM call per debate line; "fast": the whole debate in one call
+    debate_mode: str = "turns"
+
+
+T = TypeVar('T')
+
+
+def _from_row(cls: Type[T], row: Dict[str, Any]) -> T:
+    """Build a dataclass from stored fields, ignoring fields it no longer has."""
+    known = {f.name for f in fields(cls)}
+    return cls(**{key: value for key, value in row.items() if key in known})
 
 
 @dataclass
 class Session:
-    """Global session data for debate analysis."""
-    
+    """
+    Global session data for debate analysis.
+
+    `users` and `channels` act as a cache over `store`: entries are loaded on
+    first access (a guild's setup together with its players) and every set_*
+    call is written behind to the store, if it persists anything.
+    """
+
     # User sessions: user_id -> UserSession
     users: Dict[str, UserSession] = field(default_factory=dict)
-    
+
     # Channel setup per guild: guild_id -> ChannelSetup
     channels: Dict[str, ChannelSetup] = field(default_factory=dict)
-    
+
+    # Persistent backend (in-memory only by default)
+    store: SessionStore = field(default_factory=SessionStore)
+
+    # Keys already looked up in the store, including ones it didn't have
+    _loaded_guilds: Set[str] = field(default_factory=set, repr=False)
+    _loaded_users: Set[str] = field(default_factory=set, repr=False)
+
+    def _load_user(self, user_id: str) -> None:
+        """Pull a user from the store the first time it is asked for."""
+        self._loaded_users.add(user_id)
+        if user_id in self.users:
+            return
+        row = self.store.load_user(user_id)
+        if row is not None:
+            self.users[user_id] = _from_row(UserSession, row)
+
+    def _load_guild(self, guild_id: str) -> None:
+        """Pull a guild's setup and its players from the store the first time it is asked for."""
+        self._loaded_guilds.add(guild_id)
+        if guild_id in self.channels:
+            return
+        row = self.store.load_guild(guild_id)
+        if row is None:
+            return
+        setup = self.channels[guild_id] = _from_row(ChannelSetup, row)
+        for user_id in (setup.player1_id, setup.player2_id):
+            if user_id not in self._loaded_users:
+                self._load_user(user_id)
+
     def get_user_session(self, user_id: str) -> Optional[UserSession]:
         """Get session for a user."""
+        if user_id not in self._loaded_users:
+            self._load_user(user_id)
         return self.users.get(user_id)
-    
+
     def set_user_session(
         self,
         user_id: str,
@@ -43,17 +94,22 @@ class Session:
         pessimist_assistant_id: str = ""
     ) -> None:
         """Set session for a user."""
+        self._loaded_users.add(user_id)
         self.users[user_id] = UserSession(
             optimist_thread_id="",
             pessimist_thread_id="",
             optimist_assistant_id=optimist_assistant_id,
             pessimist_assistant_id=pessimist_assistant_id
         )
-    
+        if self.store.persistent:
+            self.store.save_user(user_id, asdict(self.users[user_id]))
+
     def get_channel_setup(self, guild_id: str) -> Optional[ChannelSetup]:
         """Get channel setup for a guild."""
+        if guild_id not in self._loaded_guilds:
+            self._load_guild(guild_id)
         return self.channels.get(guild_id)
-    
+
     def set_channel_setup(
         self,
         guild_id: str,
@@ -61,17 +117,35 @@ class Session:
         player2_id: str,
         general_channel_id: str,
         player1_room_id: str,
-        player2_room_id: str
+        player2_room_id: str,
+        debate_mode: str = "turns"
     ) -> None:
         """Set channel setup for a guild."""
+        self._loaded_guilds.add(guild_id)
         self.channels[guild_id] = ChannelSetup(
             player1_id=player1_id,
             player2_id=player2_id,
             general_channel_id=general_channel_id,
             player1_room_id=player1_room_id,
-            player2_room_id=player2_room_id
+            player2_room_id=player2_room_id,
+            debate_mode=debate_mode
         )
+        if self.store.persistent:
+            self.store.save_guild(guild_id, asdict(self.channels[guild_id]))
+
+    async def assistant_ids(self) -> Set[str]:
+        """Every configured assistant ID, including users not loaded since a restart."""
+        assistant_ids = await asyncio.to_thread(self.store.load_assistant_ids)
+        for user_session in self.users.values():
+            assistant_ids.add(user_session.optimist_assistant_id)
+            assistant_ids.add(user_session.pessimist_assistant_id)
+        assistant_ids.discard("")
+        return assistant_ids
+
+    async def close(self) -> None:
+        """Flush pending writes and close the store."""
+        await self.store.close()
 
 
 # Global session instance
-session = Session()
+session = Session(store=create_session_store())
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from write_behind import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+# Tables holding one JSON document per key
+GUILDS = 'channel_setups'
+USERS = 'user_sessions'
+
+Row = Dict[str, Any]
+
+
+class SessionStore:
+    """
+    Storage backend for Session.
+
+    This base implementation keeps nothing, so state lives only in the
+    Session's own dicts (the original in-memory behaviour). Loads return plain
+    dicts of dataclass fields; Session turns them back into objects.
+    """
+
+    # Whether saves are kept anywhere (Session skips serialising when not)
+    persistent = False
+
+    def load_guild(self, guild_id: str) -> Optional[Row]:
+        """Return a guild's stored channel setup fields, or None."""
+        return None
+
+    def load_user(self, user_id: str) -> Optional[Row]:
+        """Return a user's stored session fields, or None."""
+        return None
+
+    def load_assistant_ids(self) -> Set[str]:
+        """Return every assistant ID in the stored user sessions."""
+        return set()
+
+    def save_guild(self, guild_id: str, fields: Row) -> None:
+        """Persist a guild's channel setup."""
+
+    def save_user(self, user_id: str, fields: Row) -> None:
+        """Persist a user's session."""
+
+    async def flush(self) -> None:
+        """Write out anything still buffered."""
+
+    async def close(self) -> None:
+        """Flush and release resources."""
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return load/write counters."""
+        return {}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store with write-behind.
+
+    Saves are coalesced per key in memory and written in one transaction
+    after `flush_interval` seconds, on a worker thread so the event loop never
+    waits on disk. Loads are single primary-key reads done on first access to
+    a guild or user, so startup cost doesn't grow with the number of guilds.
+    They use their own read-only connection: in WAL mode a read never waits
+    for the writer thread's commit, so a lazy load can't stall the loop on it.
+    """
+
+    persistent = True
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+
+        # Writer thread's connection
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn_lock = threading.Lock()
+        with self._conn_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for table in (GUILDS, USERS):
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                )
+
+        # Loads' connection (the loop, plus the startup scan on a worker thread)
+        self._read_conn = sqlite3.connect(
+            f"{Path(path).absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._read_lock = threading.Lock()
+
+        # (table, key) -> JSON document waiting to be written
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._writer = BatchWriter(
+            "Session store",
+            flush_interval,
+            take=self._take_pending,
+            write=self._write_batch,
+            has_pending=lambda: bool(self._pending),
+            restore=self._restore_batch
+        )
+
+        # Metrics
+        self.loads = 0
+        self.load_misses = 0
+        self.writes = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+
+    def _load(self, table: str, key: str) -> Optional[Row]:
+        """Read one document by primary key."""
+        with self._read_lock:
+            row = self._read_conn.execute(f"SELECT data FROM {table} WHERE key = ?", (key,)).fetchone()
+        self.loads += 1
+        if row is None:
+            self.load_misses += 1
+            return None
+        return json.loads(row[0])
+
+    def load_guild(self, guild_id: str) -> Optional[Row]:
+        return self._load(GUILDS, guild_id)
+
+    def load_user(self, user_id: str) -> Optional[Row]:
+        return self._load(USERS, user_id)
+
+    def load_assistant_ids(self) -> Set[str]:
+        """Scan all user sessions for assistant IDs (once at startup, for thread warming)."""
+        with self._read_lock:
+            rows = self._read_conn.execute(f"SELECT data FROM {USERS}").fetchall()
+        assistant_ids = set()
+        for (data,) in rows:
+            fields = json.loads(data)
+            assistant_ids.add(fields.get('optimist_assistant_id', ''))
+            assistant_ids.add(fields.get('pessimist_assistant_id', ''))
+        assistant_ids.discard('')
+        return assistant_ids
+
+    def _save(self, table: str, key: str, fields: Row) -> None:
+        """Buffer a write; a newer save of the same key replaces an unwritten one."""
+        self._pending[(table, key)] = json.dumps(fields)
+        self._writer.schedule()
+
+    def save_guild(self, guild_id: str, fields: Row) -> None:
+        self._save(GUILDS, guild_id, fields)
+
+    def save_user(self, user_id: str, fields: Row) -> None:
+        self._save(USERS, user_id, fields)
+
+    def _take_pending(self) -> List[Tuple[str, str, str]]:
+        """Swap out the pending writes as (table, key, data) rows."""
+        batch = [(table, key, data) for (table, key), data in self._pending.items()]
+        self._pending.clear()
+        return batch
+
+    def _restore_batch(self, batch: List[Tuple[str, str, str]]) -> None:
+        """Put back rows that failed to write, unless a newer save of the same key arrived meanwhile."""
+        for table, key, data in batch:
+            self._pending.setdefault((table, key), data)
+
+    def _write_batch(self, batch: List[Tuple[str, str, str]]) -> None:
+        """Write a batch in one transaction (runs on a worker thread)."""
+        if not batch:
+            return
+        started = time.perf_counter()
+        with self._conn_lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table, key, data in batch:
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {table} (key, data) VALUES (?, ?)", (key, data)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.flush_seconds += time.perf_counter() - started
+        self.writes += len(batch)
+        self.batches += 1
+
+    async def flush(self) -> None:
+        """Write all pending saves, one batch at a time so order per key is kept."""
+        await self._writer.flush()
+
+    async def close(self) -> None:
+        """Flush pending saves and close the database."""
+        await self._writer.close()
+        with self._conn_lock:
+            self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return load/write counters and mean batch write time."""
+        return {
+            'loads': self.loads,
+            'load_misses': self.load_misses,
+            'pending': len(self._pending),
+            'writes': self.writes,
+            'batches': self.batches,
+            'write_errors': self._writer.errors,
+            'average_batch_ms': 1000 * self.flush_seconds / self.batches if self.batches else 0.0,
+        }
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_DB_PATH (in-memory only when unset)."""
+    path = os.getenv('SESSION_DB_PATH')
+    if not path:
+        return SessionStore()
+    logger.info(f"Persisting sessions to {path}")
+    return SQLiteSessionStore(
+        path,
+        flush_interval=float(os.getenv('SESSION_FLUSH_INTERVAL', '1.0'))
+    )
@@ -0,0 +1,132 @@
+import os
+import asyncio
+import time
+import logging
+import contextvars
+from collections import deque
+from typing import Deque, Dict, Iterable, Tuple
+
+from backboard_client import BackboardClient, backboard
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadPool:
+    """
+    Keeps a few fresh Backboard threads ready per assistant.
+
+    acquire() hands out a pre-created thread when one is available and falls
+    back to creating one on demand. Every checkout triggers a background
+    refill back up to `size`.
+    """
+
+    def __init__(self, client: 'BackboardClient', size: int = 2, max_age: float = 3600.0):
+        self.client = client
+        self.size = size
+        self.max_age = max_age
+
+        # assistant_id -> deque of (thread_id, created monotonic time)
+        self._ready: Dict[str, Deque[Tuple[str, float]]] = {}
+        self._refills: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.refill_errors = 0
+
+    async def acquire(self, assistant_id: str) -> str:
+        """Check out a thread for an assistant, creating one if the pool is empty."""
+        if not assistant_id:
+            raise ValueError("assistant_id is required to create a thread")
+
+        ready = self._ready.setdefault(assistant_id, deque())
+        now = time.monotonic()
+
+        thread_id = None
+        while ready:
+            candidate, created_at = ready.popleft()
+            if now - created_at <= self.max_age:
+                thread_id = candidate
+                break
+            self.expired += 1
+
+        self.warm(assistant_id)
+
+        if thread_id:
+            self.hits += 1
+            return thread_id
+
+        self.misses += 1
+        logger.debug(f"Thread pool miss for assistant {assistant_id}")
+        return await self.client.create_thread(assistant_id)
+
+    def warm(self, assistant_id: str) -> None:
+        """Start a background refill for an assistant if one is not already running."""
+        if self.size <= 0 or not assistant_id:
+            return
+
+        task = self._refills.get(assistant_id)
+        if task and not task.done():
+            return
+        # Fresh context: a refill outlives the analysis that triggered it and isn't part of its trace
+        self._refills[assistant_id] = asyncio.create_task(self._refill(assistant_id), context=contextvars.Context())
+
+    def warm_many(self, assistant_ids: Iterable[str]) -> None:
+        """Start background refills for several assistants."""
+        for assistant_id in set(assistant_ids):
+            self.warm(assistant_id)
+
+    async def _refill(self, assistant_id: str) -> None:
+        """Create threads until the assistant's pool is back to `size`."""
+        ready = self._ready.setdefault(assistant_id, deque())
+
+        # Loop because threads may be checked out while a round is in flight
+        while len(ready) < self.size:
+            deficit = self.size - len(ready)
+            results = await asyncio.gather(
+                *(self.client.create_thread(assistant_id) for _ in range(deficit)),
+                return_exceptions=True
+            )
+
+            now = time.monotonic()
+            failed = False
+            for result in results:
+                if isinstance(result, BaseException):
+                    failed = True
+                    self.refill_errors += 1
+                    logger.warning(f"Thread pool refill failed for assistant {assistant_id}: {result}")
+                else:
+                    # Never discard a created thread (it would be orphaned on the server);
+                    # only one refill runs per assistant, so this can't overfill the pool
+                    ready.append((result, now))
+
+            # Leave the rest to the next checkout rather than hammering a failing API
+            if failed:
+                return
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return pool metrics."""
+        return {
+            'size': self.size,
+            'ready': sum(len(ready) for ready in self._ready.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'refill_errors': self.refill_errors,
+        }
+
+    async def close(self) -> None:
+        """Cancel any in-flight refills."""
+        for task in self._refills.values():
+            task.cancel()
+        await asyncio.gather(*self._refills.values(), return_exceptions=True)
+        self._refills.clear()
+
+
+# Global thread pool instance
+thread_pool = ThreadPool(
+    backboard,
+    size=int(os.getenv('BACKBOARD_THREAD_POOL_SIZE', '2')),
+    max_age=float(os.getenv('BACKBOARD_THREAD_MAX_AGE', '3600'))
+)
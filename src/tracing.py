@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import logging
+import itertools
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from write_behind import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+
+# Traces that keep their process number, so spans finishing after their root still land in its row
+MAX_TRACES = 1024
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'args', 'started')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], args: Dict[str, Any], started: float):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.args = args
+        self.started = started
+
+
+class Tracer:
+    """
+    Span tracing across one analysis, exported as Chrome trace events.
+
+    A trace starts at an /analyze interaction; spans opened while it is the
+    current context (including in tasks created from it) belong to it. Each
+    finished span is one complete ('X') event per line of `path`: every trace
+    is its own process row and every asyncio task its own thread lane, so the
+    file opens as a flame chart of each analysis (see to_chrome_trace).
+    Outside a trace, or with no `path`, spans are no-ops.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._current: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+        self._pending: List[Dict[str, Any]] = []
+        # Spans are diagnostics: a batch that fails to write is dropped, not retried
+        self._writer = BatchWriter(
+            "Trace",
+            flush_interval,
+            take=self._take_pending,
+            write=self._write,
+            has_pending=lambda: bool(self._pending)
+        )
+        self._pids: 'OrderedDict[str, int]' = OrderedDict()
+        self._tids: 'weakref.WeakKeyDictionary[asyncio.Task, int]' = weakref.WeakKeyDictionary()
+        self._next_tid = itertools.count(1)
+        self._next_pid = itertools.count(1)
+        # Metrics
+        self.spans = 0
+        self.written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return uuid.uuid4().hex
+
+    def current(self) -> Optional[Span]:
+        """The innermost open span of this context, if it is being traced."""
+        return self._current.get()
+
+    def current_trace_id(self) -> Optional[str]:
+        span = self._current.get()
+        return span.trace_id if span else None
+
+    def trace(self, name: str, trace_id: Optional[str] = None, started: Optional[float] = None, **args: Any):
+        """
+        Open the root span of a trace (a new one unless `trace_id` is given).
+
+        `started` (a time.perf_counter() value) backdates the span, e.g. to
+        when a queued job was requested.
+        """
+        if not self.enabled:
+            return _NOOP
+        return self._span(name, trace_id or self.new_trace_id(), None, started, args)
+
+    def span(self, name: str, parent: Optional[Span] = None, **args: Any):
+        """Open a child of `parent` (by default the current span); a no-op outside a trace."""
+        if parent is None:
+            parent = self._current.get()
+            if parent is None:
+                return _NOOP
+        return self._span(name, parent.trace_id, parent.span_id, None, args)
+
+    def record(self, name: str, started: float, parent: Optional[Span] = None, **args: Any) -> None:
+        """Record a span that ran from `started` (time.perf_counter()) until now."""
+        if parent is None:
+            parent = self._current.get()
+            if parent is None:
+                return
+        self._emit(Span(name, parent.trace_id, parent.span_id, args, started), time.perf_counter())
+
+    @contextmanager
+    def _span(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        started: Optional[float],
+        args: Dict[str, Any]
+    ) -> Iterator[Span]:
+        span = Span(name, trace_id, parent_id, args, started if started is not None else time.perf_counter())
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.args['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current.reset(token)
+            self._emit(span, time.perf_counter())
+
+    def _tid(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            return 0
+        tid = self._tids.get(task)
+        if tid is None:
+            tid = self._tids[task] = next(self._next_tid)
+        return tid
+
+    def _emit(self, span: Span, finished: float) -> None:
+        pid = self._pids.get(span.trace_id)
+        if pid is None:
+            pid = self._pids[span.trace_id] = next(self._next_pid)
+            if len(self._pids) > MAX_TRACES:
+                self._pids.popitem(last=False)
+            self._pending.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                'args': {'name': f"trace {span.trace_id}", 'trace_id': span.trace_id}
+            })
+        self._pending.append({
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': round(span.started * 1e6),
+            'dur': round((finished - span.started) * 1e6),
+            'pid': pid,
+            'tid': self._tid(),
+            'args': {
+                'trace_id': span.trace_id,
+                'span_id': span.span_id,
+                'parent_id': span.parent_id,
+                **{key: value if isinstance(value, (int, float, bool)) else str(value) for key, value in span.args.items()}
+            }
+        })
+        self.spans += 1
+        self._writer.schedule()
+
+    def _take_pending(self) -> List[Dict[str, Any]]:
+        pending = self._pending
+        self._pending = []
+        return pending
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events))
+        self.written += len(events)
+
+    async def flush(self) -> None:
+        """Write finished spans to the trace file (off the event loop)."""
+        await self._writer.flush()
+
+    async def close(self) -> None:
+        await self._writer.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return span, write and write error counters."""
+        return {
+            'spans': self.spans,
+            'pending': len(self._pending),
+            'written': self.written,
+            'write_errors': self._writer.errors,
+        }
+
+
+def to_chrome_trace(path: str, trace_id: Optional[str] = None) -> Dict[str, Any]:
+    """Load a trace file (optionally one trace) as a Chrome/Perfetto JSON trace object."""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if trace_id is None or event.get('args', {}).get('trace_id') == trace_id:
+                events.append(event)
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+# Global tracer instance (disabled unless TRACE_FILE is set)
+tracer = Tracer(os.getenv('TRACE_FILE') or None)
+
+
+if __name__ == "__main__":
+    # python src/tracing.py trace.jsonl [trace_id] > analysis.json, then open in ui.perfetto.dev
+    if len(sys.argv) < 2:
+        sys.exit("usage: tracing.py TRACE_FILE [TRACE_ID]")
+    json.dump(to_chrome_trace(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None), sys.stdout)
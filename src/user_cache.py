@@ -0,0 +1,85 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import discord
+
+logger = logging.getLogger(__name__)
+
+UserLike = Union['discord.User', 'discord.Member']
+
+
+class UserCache:
+    """
+    Small LRU of Discord users, so /analyze doesn't fetch players over REST every run.
+
+    Lookups try the client's own cache (kept current by the gateway), then the
+    LRU, then fetch_user; concurrent lookups of the same ID share one request.
+    LRU entries expire after `ttl` seconds so renames are picked up. Members
+    are stored as their global User, so display_name is the same global name
+    fetch_user would give rather than a guild nickname.
+    """
+
+    def __init__(self, client: 'discord.Client', max_entries: int = 256, ttl: float = 600.0):
+        self.client = client
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user ID -> (user, time cached)
+        self._users: 'OrderedDict[int, Tuple[discord.User, float]]' = OrderedDict()
+        self._fetches: Dict[int, asyncio.Future] = {}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def put(self, user: UserLike) -> None:
+        """Remember a user we already have (e.g. from slash command arguments)."""
+        # A Member wraps the global User; keep that, not the guild view
+        user = getattr(user, '_user', user)
+        self._users[user.id] = (user, time.monotonic())
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+
+    async def get(self, user_id: int) -> 'discord.User':
+        """Resolve a user by ID."""
+        user = self.client.get_user(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        entry = self._users.get(user_id)
+        if entry is not None:
+            user, cached_at = entry
+            if time.monotonic() - cached_at <= self.ttl:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return user
+            del self._users[user_id]
+            self.expired += 1
+
+        pending = self._fetches.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        pending = self._fetches[user_id] = asyncio.ensure_future(self.client.fetch_user(user_id))
+        try:
+            user = await asyncio.shield(pending)
+        finally:
+            self._fetches.pop(user_id, None)
+        self.put(user)
+        return user
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return hit/miss/expiry counters."""
+        return {
+            'entries': len(self._users),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+        }
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from backboard_client import BackboardClient
+
+logger = logging.getLogger(__name__)
+
+
+class OrderedTasks:
+    """
+    Runs awaitables in the background, strictly one after another per key.
+
+    Used to take writes that don't produce anything we need (context writes)
+    off the critical path while keeping their order.
+    """
+
+    def __init__(self):
+        self._tails: Dict[str, asyncio.Task] = {}
+
+    def submit(self, key: str, awaitable: Awaitable[Any]) -> asyncio.Task:
+        """Schedule an awaitable to run after everything already queued for `key`."""
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run_after(previous, awaitable))
+        self._tails[key] = task
+        return task
+
+    async def _run_after(self, previous: Optional[asyncio.Task], awaitable: Awaitable[Any]) -> Any:
+        """Wait for the previous task on the same key, then run."""
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            return await awaitable
+        except Exception as e:
+            logger.error(f"Background write failed: {e}")
+            return None
+
+    async def drain(self, key: Optional[str] = None) -> None:
+        """Wait until everything queued (for one key, or all keys) has run."""
+        if key is None:
+            tails = list(self._tails.values())
+        else:
+            tails = [self._tails[key]] if key in self._tails else []
+        if tails:
+            await asyncio.gather(*tails, return_exceptions=True)
+
+    def cancel(self) -> None:
+        """Cancel everything still queued."""
+        for task in self._tails.values():
+            task.cancel()
+        self._tails.clear()
+
+
+class BatchWriter:
+    """
+    Flushes an owner's pending writes in batches on a worker thread.
+
+    The owner buffers writes itself and calls schedule() after each one.
+    `take` swaps out everything pending as one batch (falsy when empty),
+    `write` persists a batch (on a worker thread) and `restore`, if given,
+    puts a batch that failed to write back. A flush runs `interval` seconds
+    after the first write; when it finishes, it keeps flushing (one batch
+    at a time) for as long as more is pending, so writes that arrive during
+    a flush, or a batch put back after an error, are never stranded. Without
+    a running event loop, schedule() writes through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        take: Callable[[], Any],
+        write: Callable[[Any], None],
+        has_pending: Callable[[], bool],
+        restore: Optional[Callable[[Any], None]] = None
+    ):
+        self.name = name
+        self.interval = interval
+        self._take = take
+        self._write = write
+        self._has_pending = has_pending
+        self._restore = restore
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._wake = asyncio.Event()
+        self.errors = 0
+
+    def schedule(self) -> None:
+        """Make sure a flush will pick up what was just buffered."""
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, shutdown): write through
+            batch = self._take()
+            if batch:
+                self._write(batch)
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Let writes accumulate for a moment, then flush until nothing is left."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            closing = self._wake.is_set()
+            self._wake.clear()
+            await self.flush()
+            if closing or not self._has_pending():
+                return
+
+    async def flush(self) -> None:
+        """Write one batch of everything pending (batches never overlap, so order is kept)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"{self.name} write failed: {e}")
+                if self._restore:
+                    self._restore(batch)
+
+    async def close(self) -> None:
+        """Flush right away and wait for it, instead of after the interval."""
+        if self._task is not None and not self._task.done():
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+
+class ThreadWriter:
+    """
+    Write-behind buffer for context messages that don't invoke the LLM.
+
+    Deferred writes are folded, in order, into the next LLM request on the
+    same thread, so they reach the thread before that request's prompt
+    without a round trip of their own. Writes still pending at the end are
+    sent by flush().
+    """
+
+    def __init__(self, client: 'BackboardClient'):
+        self.client = client
+        self._pending: Dict[str, List[str]] = {}
+        self._writes = OrderedTasks()
+
+    def defer(self, thread_id: str, content: str) -> None:
+        """Queue a context write for a thread."""
+        self._pending.setdefault(thread_id, []).append(content)
+
+    def with_pending(self, thread_id: str, content: str) -> str:
+        """Prefix a request's content with the thread's pending writes and clear them."""
+        pending = self._pending.pop(thread_id, [])
+        if not pending:
+            return content
+        return "\n\n".join(pending + [content])
+
+    def flush(self) -> None:
+        """Send all pending writes in the background, in order per thread."""
+        for thread_id, pending in self._pending.items():
+            for content in pending:
+                self._writes.submit(
+                    thread_id,
+                    self.client.send_message(
+                        thread_id=thread_id,
+                        content=content,
+                        send_to_llm=False,
+                        memory="off"
+                    )
+                )
+        self._pending.clear()
+
+    async def drain(self) -> None:
+        """Wait for flushed writes to finish."""
+        await self._writes.drain()